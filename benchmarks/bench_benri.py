@@ -0,0 +1,329 @@
+"""Benchmarks for the data and graphics hot paths of benri.
+
+Generates synthetic grid-search result tables and times `split_df`,
+`aggregate_and_save_top_configs`, `bootstrap_top_configs` and `plot_boxplots` (Agg backend, rendered to
+an in-memory buffer) across sizes. Each case runs in a fresh process so peak
+RSS is measured per case.
+
+`--check` instead verifies that the optimized paths give the same results as
+the straightforward ones (e.g. streamed vs. in-memory aggregation).
+
+Usage:
+    python benchmarks/bench_benri.py --sizes 10000 100000 --output bench.json
+    python benchmarks/bench_benri.py --compare bench.json --tolerance 0.25
+    python benchmarks/bench_benri.py --check
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def make_results(n_rows, n_group_cols=4, cardinality=5, seed=0):
+    """Synthetic results table shaped like results_grid_search.csv.
+
+    Args:
+        n_rows: number of result rows (runs).
+        n_group_cols: number of hyperparameter columns.
+        cardinality: distinct values per hyperparameter column.
+        seed: random seed.
+
+    Returns:
+        DataFrame with hyperparameter columns, a 'seed' column and 'test_auc'.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_group_cols):
+        # Mix numeric and string hyperparameters like real sweeps do
+        if i % 2 == 0:
+            data[f"hp{i}"] = rng.choice(np.logspace(-4, 0, cardinality), n_rows)
+        else:
+            data[f"hp{i}"] = rng.choice([f"opt{k}" for k in range(cardinality)], n_rows)
+    data['seed'] = rng.integers(0, 10, n_rows)
+    data['test_auc'] = np.clip(rng.normal(0.75, 0.08, n_rows), 0, 1)
+    return pd.DataFrame(data)
+
+
+def _bench_split_df(df, group_cols):
+    from benri.data import split_df
+    split_df(df, group_cols[0])
+
+
+def _bench_aggregate(df, group_cols):
+    import contextlib
+    from benri.data import aggregate_and_save_top_configs
+    with tempfile.TemporaryDirectory() as table_dir, contextlib.redirect_stdout(io.StringIO()):
+        aggregate_and_save_top_configs(df, group_cols, 'test_auc', table_dir)
+
+
+def _bench_aggregate_stream(path, group_cols):
+    import contextlib
+    from benri.data import aggregate_and_save_top_configs
+    with tempfile.TemporaryDirectory() as table_dir, contextlib.redirect_stdout(io.StringIO()):
+        aggregate_and_save_top_configs(str(path), group_cols, 'test_auc', table_dir)
+
+
+def _bench_bootstrap(df, group_cols):
+    from benri.data import bootstrap_top_configs
+    bootstrap_top_configs(df, group_cols, 'test_auc', n_boot=1000)
+
+
+def _write_csv(df, workdir):
+    """Setup for path-based benchmarks: the CSV is written once, outside the timing."""
+    path = Path(workdir) / 'results_grid_search.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+def _bench_plot_boxplots(df, group_cols, precompute_stats=False):
+    import contextlib
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from benri.data import split_df
+    from benri.graphics import plot_boxplots
+
+    df_list, labels = split_df(df, group_cols[0])
+    buffer = io.BytesIO()
+    show = plt.show
+    plt.show = lambda: plt.savefig(buffer, format='png')
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            plot_boxplots(df_list, labels, value_column='test_auc', separation=group_cols[1],
+                          precompute_stats=precompute_stats)
+    finally:
+        plt.show = show
+        plt.close('all')
+
+
+def _bench_plot_boxplots_stats(df, group_cols):
+    _bench_plot_boxplots(df, group_cols, precompute_stats=True)
+
+
+# name -> (benchmark function, optional setup turning (df, workdir) into its first argument)
+BENCHMARKS = {
+    'split_df': (_bench_split_df, None),
+    'aggregate': (_bench_aggregate, None),
+    'aggregate_stream': (_bench_aggregate_stream, _write_csv),
+    'bootstrap': (_bench_bootstrap, None),
+    'plot_boxplots': (_bench_plot_boxplots, None),
+    'plot_boxplots_stats': (_bench_plot_boxplots_stats, None),
+}
+
+
+def _run_case(name, n_rows, n_group_cols, cardinality, repeat):
+    """Run one benchmark case; executed in a fresh process."""
+    df = make_results(n_rows, n_group_cols, cardinality)
+    group_cols = [c for c in df.columns if c.startswith('hp')]
+    func, setup = BENCHMARKS[name]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data = df if setup is None else setup(df, workdir)
+
+        func(data, group_cols)  # warm-up (imports, caches)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(data, group_cols)
+            times.append(time.perf_counter() - start)
+
+        # Separate traced run: tracemalloc slows the code down, so it is not timed
+        tracemalloc.start()
+        func(data, group_cols)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss = rss if sys.platform == 'darwin' else rss * 1024
+
+    return {
+        'benchmark': name,
+        'rows': n_rows,
+        'group_cols': n_group_cols,
+        'cardinality': cardinality,
+        'wall_min_s': min(times),
+        'wall_median_s': float(np.median(times)),
+        'peak_rss_bytes': peak_rss,
+        'peak_traced_bytes': peak_traced,
+        'live_allocations': sum(stat.count for stat in snapshot.statistics('filename')),
+    }
+
+
+def _aggregate_all_paths(path, group_cols, workdir):
+    """Aggregated tables of one CSV: in memory, streamed in small chunks and through the cache."""
+    import contextlib
+    from benri.data import AggregationCache, aggregate_and_save_top_configs
+    workdir = Path(workdir)
+    sources = {
+        'in-memory': (pd.read_csv(path), {}),
+        'streamed': (str(path), {'chunksize': 50}),
+        'cached': (str(path), {'chunksize': 50, 'cache': AggregationCache(workdir / 'cache')}),
+    }
+    tables = {}
+    for name, (source, kwargs) in sources.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            agg, _ = aggregate_and_save_top_configs(source, group_cols, 'test_auc', workdir / name, **kwargs)
+        tables[name] = agg
+    return tables
+
+
+def _check_aggregate_paths(workdir):
+    """Streamed and cached aggregation must equal the in-memory path exactly, also for keys that change type."""
+    df = make_results(2_000, n_group_cols=2, cardinality=5)
+    files = {'synthetic': df}
+    # A key column that reads as numbers in the first chunks and holds text, a float
+    # or a missing value later on
+    for tail in ('a', '1.5', ''):
+        mixed = df.copy()
+        mixed['hp0'] = np.where(np.arange(len(df)) % 10, '1', '2')
+        mixed.loc[len(df) - 5, 'hp0'] = tail
+        files[f"mixed keys ({tail or 'missing'})"] = mixed
+
+    failures = []
+    for i, (label, frame) in enumerate(files.items()):
+        path = Path(workdir) / f"results_{i}.csv"
+        frame.to_csv(path, index=False)
+        tables = _aggregate_all_paths(path, ['hp0', 'hp1'], Path(workdir) / path.stem)
+        reference = tables['in-memory']
+        for name, agg in tables.items():
+            if agg is None:
+                failures.append(f"{label}: {name} aggregation failed")
+                continue
+            if not agg.equals(reference):
+                failures.append(f"{label}: {name} differs from the in-memory aggregation")
+    return failures
+
+
+def _check_rotations(workdir):
+    """Vectorized rotations must match rotating every register on its own, qubit by qubit."""
+    from benri.quantum import FalseQubitSystem, Rotation
+    rng = np.random.default_rng(0)
+    states = rng.uniform(-1, 1, (4, 3, 2))
+    per_register = rng.uniform(0, np.pi, 4)
+    per_qubit = rng.uniform(0, np.pi, (4, 2))
+    # label -> (qubits, axis, angles as passed, the same angles as (N_batch, n_selected))
+    cases = {
+        'one qubit, one angle per register': (1, 'X', per_register, per_register[:, None]),
+        'numpy int qubit, one angle per register': (np.int64(2), 'Y', per_register, per_register[:, None]),
+        'one qubit, one angle': (0, 'Z', 0.3, np.full((4, 1), 0.3)),
+        'two qubits, one angle per register and qubit': ([0, 2], 'XZ', per_qubit, per_qubit),
+    }
+    failures = []
+    for label, (qubits, axis, angles, expected_angles) in cases.items():
+        system = Rotation(FalseQubitSystem(states, backend='numpy', dtype='float64'), qubits, axis, angles)
+        axes = list(axis) if len(axis) > 1 else [axis] * expected_angles.shape[1]
+        for b in range(len(states)):
+            single = FalseQubitSystem(states[b], backend='numpy', dtype='float64')
+            for q, a, angle in zip(np.atleast_1d(qubits), axes, expected_angles[b]):
+                Rotation(single, int(q), a, float(angle))
+            if not np.allclose(system.numpy()[b], single.numpy()[0]):
+                failures.append(f"{label}: register {b} differs from the one-register rotation")
+                break
+    return failures
+
+
+CHECKS = {
+    'aggregate_paths': _check_aggregate_paths,
+    'rotations': _check_rotations,
+}
+
+
+def check():
+    """Run every correctness check; returns the list of failures."""
+    failures = []
+    for name, func in CHECKS.items():
+        with tempfile.TemporaryDirectory() as workdir:
+            try:
+                found = func(workdir)
+            except Exception as e:
+                found = [f"{name}: {type(e).__name__}: {e}"]
+        print(f"{name:<22} {'FAILED' if found else 'ok'}")
+        failures.extend(found)
+    for failure in failures:
+        print(f"  {failure}")
+    return failures
+
+
+def run(sizes, benchmarks, n_group_cols, cardinality, repeat):
+    results = []
+    ctx = multiprocessing.get_context('spawn')
+    for name in benchmarks:
+        for n_rows in sizes:
+            with ctx.Pool(1) as pool:
+                result = pool.apply(_run_case, (name, n_rows, n_group_cols, cardinality, repeat))
+            results.append(result)
+            print(f"{name:<22} rows={n_rows:<10} min={result['wall_min_s']:.4f}s "
+                  f"rss={result['peak_rss_bytes'] / 2**20:.1f}MiB "
+                  f"traced={result['peak_traced_bytes'] / 2**20:.1f}MiB")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print slowdowns vs. a baseline run; returns the list of regressions."""
+    key = lambda r: (r['benchmark'], r['rows'], r['group_cols'], r['cardinality'])
+    previous = {key(r): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        ratio = result['wall_min_s'] / old['wall_min_s']
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{result['benchmark']:<22} rows={result['rows']:<10} {ratio:6.2f}x {flag}")
+        if flag:
+            regressions.append((result['benchmark'], result['rows'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument('--group-cols', type=int, default=4)
+    parser.add_argument('--cardinality', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="write results as JSON to this path")
+    parser.add_argument('--compare', help="baseline JSON to compare against; exits 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument('--check', action='store_true', help="only run the correctness checks; exits 1 on failures")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return 1 if check() else 0
+
+    results = run(args.sizes, args.benchmarks, args.group_cols, args.cardinality, args.repeat)
+
+    if args.output:
+        payload = {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'results': results,
+        }
+        Path(args.output).write_text(json.dumps(payload, indent=2))
+        print(f"Saved benchmark results to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
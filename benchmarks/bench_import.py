@@ -0,0 +1,88 @@
+"""Startup-time budget for benri's entry points.
+
+Each case imports a module (or runs a CLI mode) in a fresh interpreter and
+reports the wall time above a bare `python -c pass`. A case fails when its best
+time exceeds its budget or when it loads a module it must not need (the cheap
+paths must never pull in pandas, matplotlib or telegram).
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --repeat 10 --scale 2.0
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / 'src'
+HEAVY = ('pandas', 'matplotlib', 'seaborn', 'telegram', 'numpy')
+
+# name -> (code run in the child, budget in seconds, modules it must not load)
+CASES = {
+    'import benri': ("import benri", 0.05, HEAVY),
+    'import benri.cli': ("import benri.cli", 0.05, HEAVY),
+    'bot module': ("import benri.cli; benri.cli._bot_module()", 0.15, HEAVY),
+    'benri alert': ("import benri.cli, tempfile; "
+                    "benri.cli.main(['alert', 'bench', '--spool', tempfile.mkdtemp()])", 0.15, HEAVY),
+    'import benri.data': ("import benri.data", 2.0, ('matplotlib', 'seaborn', 'telegram')),
+}
+
+_REPORT = "; import sys; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+
+
+def _time_child(code, env):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "child failed")
+    return elapsed, result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ""
+
+
+def run(cases, repeat, scale):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(SRC), os.environ.get('PYTHONPATH')])))
+    baseline = min(_time_child("pass", env)[0] for _ in range(repeat))
+    print(f"{'interpreter':<20} {baseline * 1000:7.1f} ms (subtracted)")
+
+    failures = []
+    for name in cases:
+        code, budget, forbidden = CASES[name]
+        budget *= scale
+        try:
+            runs = [_time_child(code + _REPORT.format(heavy=forbidden), env) for _ in range(repeat)]
+        except RuntimeError as e:
+            print(f"{name:<20} ERROR {e}")
+            failures.append(name)
+            continue
+        best = min(elapsed for elapsed, _ in runs) - baseline
+        loaded = runs[0][1]
+
+        problems = []
+        if best > budget:
+            problems.append(f"over budget ({budget * 1000:.0f} ms)")
+        if loaded:
+            problems.append(f"loaded {loaded}")
+        print(f"{name:<20} {best * 1000:7.1f} ms  {'FAIL: ' + '; '.join(problems) if problems else 'ok'}")
+        if problems:
+            failures.append(name)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply every budget (slow machines)")
+    args = parser.parse_args(argv)
+
+    failures = run(args.cases, args.repeat, args.scale)
+    if failures:
+        print(f"{len(failures)} case(s) failed the startup budget.")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
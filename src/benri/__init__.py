@@ -1,10 +1,44 @@
-# Import functions from the internal modules
-from .data import split_df, aggregate_and_save_top_configs
-from .graphics import plot_boxplots
+# Public functions are loaded lazily (PEP 562): "import benri" stays cheap and
+# pandas/matplotlib/seaborn are only imported with the module that needs them
+import importlib
+
+_EXPORTS = {
+    "split_df": ".data",
+    "aggregate_and_save_top_configs": ".data",
+    "select_top_configs": ".data",
+    "aggregate_experiments": ".data",
+    "load_table": ".data",
+    "bootstrap_top_configs": ".data",
+    "plot_boxplots": ".graphics",
+    "render_boxplots": ".graphics",
+    "render_resource_usage": ".graphics",
+    "LiveCurves": ".graphics",
+    "ExperimentWriter": ".writer",
+    "write_json_atomic": ".writer",
+}
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
 # Define what gets imported if someone runs "from benri import *"
 __all__ = [
-    "split_df", 
-    "aggregate_and_save_top_configs", 
-    "plot_boxplots"
-]
\ No newline at end of file
+    "split_df",
+    "aggregate_and_save_top_configs",
+    "select_top_configs",
+    "aggregate_experiments",
+    "load_table",
+    "bootstrap_top_configs",
+    "plot_boxplots",
+    "render_boxplots",
+    "render_resource_usage",
+    "LiveCurves",
+    "ExperimentWriter",
+    "write_json_atomic"
+]
@@ -0,0 +1,49 @@
+"""Command line entry point: `benri bot | alert | status`.
+
+Only the standard library is imported up front; the `alert` and `status` modes
+never load telegram, pandas or matplotlib, so failure hooks and quick checks
+start in milliseconds.
+"""
+import argparse
+import sys
+
+def _bot_module():
+    """benri.telegram_bot (imported on first use; it is cheap, telegram loads in `main`)."""
+    from . import telegram_bot
+    return telegram_bot
+
+def _status(bot):
+    lines = []
+    for folder, data, state_error in bot.REGISTRY.experiments():
+        if state_error or not data or 'running' not in str(data.get('status', 'running')).lower():
+            continue
+        lines.append(f"{folder}  {data.get('idx', '?')}/{data.get('total', '?')}")
+    print("Running experiments" if lines else "No running experiments.")
+    for line in lines:
+        print(f"  {line}")
+    print(bot.SCHEDULER.describe())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benri", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("bot", help="run the Telegram bot")
+    alert = commands.add_parser("alert", help="queue a crash alert for the running bot")
+    alert.add_argument("name", help="experiment folder name")
+    alert.add_argument("--code", type=int, help="exit code of the failed run")
+    alert.add_argument("--spool", help="alert spool directory (default: the bot's)")
+    commands.add_parser("status", help="print running experiments and the job queue")
+    args = parser.parse_args(argv)
+
+    bot = _bot_module()
+    if args.command == "bot":
+        return bot.main([])
+    if args.command == "alert":
+        spool = bot.AlertSpool(args.spool) if args.spool else bot.ALERTS
+        spool.write(args.name, args.code)
+        return 0
+    _status(bot)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,73 +1,976 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
+import hashlib
+import io
+import contextlib
+import glob
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .profiling import profiled, span
 
-def split_df(df, split_by):
-    
-    df_list = []
-    labels = []
+def _factorize_keys(df, split_by, sort=False):
+    """Factorize one or several key columns into a single integer code per row.
+
+    Returns:
+        (codes, labels) where codes[i] is the group of row i and labels[c] is the
+        display label of group c. NaN keys form their own group, like `unique()`.
+    """
+    if isinstance(split_by, (list, tuple)):
+        cols = list(split_by)
+    else:
+        cols = [split_by]
+
+    if len(cols) == 1:
+        codes, uniques = pd.factorize(df[cols[0]], sort=sort, use_na_sentinel=False)
+        return codes, [str(u) for u in uniques]
+
+    combined = None
+    uniques_per_col = []
+    for col in cols:
+        codes, uniques = pd.factorize(df[col], sort=sort, use_na_sentinel=False)
+        uniques_per_col.append(uniques)
+        codes = codes.astype(np.int64)
+        combined = codes if combined is None else combined * len(uniques) + codes
+
+    # Re-factorize the combined code so only observed combinations become groups
+    codes, combined_uniques = pd.factorize(combined, sort=sort)
+
+    # Decode each combined value back into its per-column positions
+    parts = []
+    remainder = np.asarray(combined_uniques)
+    for uniques in reversed(uniques_per_col):
+        remainder, part = np.divmod(remainder, len(uniques))
+        parts.append(part)
+    parts.reverse()
+
+    labels = [
+        ', '.join(str(uniques[p]) for uniques, p in zip(uniques_per_col, row))
+        for row in zip(*parts)
+    ]
+    return codes, labels
+
+def split_df(df, split_by, sort=False, as_indices=False):
+    """Split a DataFrame into one DataFrame per unique value of `split_by`.
+
+    The key is factorized once and rows are partitioned with a single stable
+    sort, so the cost does not grow with the number of unique values.
+
+    Args:
+        df: DataFrame to split.
+        split_by: column name or list of column names to split on.
+        sort: if True, labels are sorted; otherwise they follow order of appearance.
+        as_indices: if True, return arrays of row positions instead of DataFrames.
+
+    Returns:
+        (df_list, labels). With `as_indices=True`, df_list holds positional index
+        arrays that can be passed to `df.iloc`. Multi-column labels are joined by ', '.
+    """
+    codes, labels = _factorize_keys(df, split_by, sort=sort)
+
+    order = np.argsort(codes, kind='stable')
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(labels)))))
+
+    if as_indices:
+        return [order[bounds[i]:bounds[i + 1]] for i in range(len(labels))], labels
+
+    # One reordered frame; every partition is a contiguous slice of it
+    ordered = df.iloc[order]
+    df_list = [ordered.iloc[bounds[i]:bounds[i + 1]] for i in range(len(labels))]
 
-    for element in df[split_by].unique():
-        df_list.append( df[ df[split_by] == element ] )
-        labels.append(str(element))
-    
     return df_list, labels
 
-def aggregate_and_save_top_configs(df, group_cols, value_column, table_dir, n=10):
-    """Aggregate results by hyperparameter columns and save aggregated + top-n CSVs.
+class _QuantileSketch:
+    """Mergeable t-digest style quantile sketch with bounded memory.
+
+    Values are kept as (mean, weight) centroids. On compression, points are
+    clustered by the integer part of the k1 scale function
+    k(q) = compression / (2*pi) * asin(2q - 1), which keeps tails precise and
+    bounds the number of centroids to roughly `compression / 2`.
+    Small inputs stay uncompressed, so their quantiles are exact.
+    """
+
+    def __init__(self, compression=100, buffer_size=None):
+        self.compression = compression
+        self.buffer_size = buffer_size or 10 * compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer = []
+        self._buffered = 0
+
+    def update(self, values, weights=None):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        if weights is None:
+            weights = np.ones(values.size)
+        self._buffer.append((values, np.asarray(weights, dtype=float)))
+        self._buffered += values.size
+        if self._buffered > self.buffer_size:
+            self._compress()
+
+    def merge(self, other):
+        other._compress()
+        self.update(other.means, other.weights)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means] + [v for v, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [w for _, w in self._buffer])
+        self._buffer, self._buffered = [], 0
+
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+
+        total = weights.sum()
+        if len(means) <= self.compression:
+            self.means, self.weights = means, weights
+            return
+
+        # Cluster id = floor of the k-scale at each centroid's left edge
+        q_left = (np.cumsum(weights) - weights) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+        cluster = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q):
+        self._compress()
+        if self.weights.size == 0:
+            return np.nan
+        if self.weights.size == 1:
+            return float(self.means[0])
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), centers, self.means))
+
+def _welford_merge(state, count, mean, m2):
+    """Merge a batch (count, mean, M2) into a running Welford state (Chan et al.)."""
+    n_a, mean_a, m2_a = state
+    n = n_a + count
+    if n == 0:
+        return state
+    delta = mean - mean_a
+    mean_ab = mean_a + delta * count / n
+    m2_ab = m2_a + m2 + delta * delta * n_a * count / n
+    return (n, mean_ab, m2_ab)
+
+_TABLE_SUFFIXES = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+def _is_columnar(path):
+    return Path(path).suffix.lower() in ('.parquet', '.pq', '.feather', '.arrow')
+
+def _read_feather_table(path, columns=None):
+    """Memory-mapped Arrow table from a Feather (Arrow IPC) file."""
+    try:
+        import pyarrow.feather as feather
+    except ImportError as e:
+        raise ImportError("Reading Feather files requires 'pyarrow'.") from e
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+def _read_in_chunks(path, columns, chunksize, dtype=None):
+    """Yield DataFrame chunks holding only `columns` from a CSV, Parquet or Feather file.
+
+    `dtype` (a dict) is passed to read_csv; columnar files carry their own types.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in ('.parquet', '.pq'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Reading Parquet files in chunks requires 'pyarrow'.") from e
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif suffix in ('.feather', '.arrow'):
+        for batch in _read_feather_table(path, columns).to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize, dtype=dtype)
+
+def _widen_dtype(a, b):
+    """Dtype a single parse gives a CSV column that parsed as `a` in one chunk and `b` in another."""
+    if a == b:
+        return a
+    numeric = [pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in (a, b)]
+    if all(numeric):
+        return np.result_type(a, b)  # e.g. int64 and float64 (a chunk with missing keys) -> float64
+    return str  # mixed numbers and text stay text, as in a whole-file read
+
+def _csv_key_dtypes(path, group_cols, chunksize=100_000):
+    """Dtypes of the grouping columns that fit every chunk of a CSV (see `_widen_dtype`)."""
+    dtypes = {}
+    for chunk in pd.read_csv(path, usecols=list(group_cols), chunksize=chunksize):
+        for col in group_cols:
+            dtypes[col] = _widen_dtype(dtypes[col], chunk[col].dtype) if col in dtypes else chunk[col].dtype
+    return dtypes
+
+def _downcast(df):
+    """Categoricals for repeated strings and float32 for floats that survive the round trip."""
+    out = df.copy()
+    for col in out.columns:
+        series = out[col]
+        if series.dtype == np.float64:
+            values = series.to_numpy()
+            as_float32 = values.astype(np.float32)
+            if np.array_equal(as_float32.astype(np.float64), values, equal_nan=True):
+                out[col] = as_float32
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if len(series) and series.nunique(dropna=False) <= len(series) // 2:
+                out[col] = series.astype('category')
+    return out
+
+def _save_table(df, table_dir, stem, file_format='csv'):
+    """Write `df` as table_dir/stem.<ext> in the given format and return the path.
+
+    Columnar formats are downcast first; Feather is written uncompressed so it
+    can be memory-mapped by `load_table`.
+    """
+    path = table_dir / f"{stem}{_TABLE_SUFFIXES[file_format]}"
+    if file_format == 'csv':
+        df.to_csv(path, index=False)
+    elif file_format == 'parquet':
+        _downcast(df).to_parquet(path, index=False)
+    else:
+        _downcast(df).reset_index(drop=True).to_feather(path, compression='uncompressed')
+    return path
+
+@profiled()
+def load_table(path, columns=None, downcast=True):
+    """Load a results or aggregated table, reading only `columns`.
+
+    Feather files are memory-mapped, Parquet files read only the requested
+    columns, and CSV files are parsed with `usecols`.
+
+    Args:
+        path: path to a .csv, .parquet or .feather file.
+        columns: optional list of columns to load (e.g. group_cols + [value_column]).
+        downcast: convert repeated strings to categoricals and floats to float32
+            where that is lossless.
+
+    Returns:
+        DataFrame with the requested columns.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in ('.feather', '.arrow'):
+        df = _read_feather_table(path, columns).to_pandas()
+    elif suffix in ('.parquet', '.pq'):
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns)
+
+    return _downcast(df) if downcast else df
+
+def _aggregate_frame(df, group_cols, value_column):
+    """Median and std of `value_column` for every grouping tuple."""
+    return df.groupby(group_cols)[value_column].agg(['median', 'std']).reset_index()
+
+class _StreamingAggregator:
+    """Per-group aggregation state that is fed one chunk at a time.
+
+    In exact mode every group keeps its values in arrival order, and `result()`
+    reduces them with the same pandas groupby as the in-memory path, so the
+    median and std are identical to it. In approximate mode every group keeps a
+    Welford accumulator (count, mean, M2) for the std and a `_QuantileSketch`
+    for the median, so memory is bounded by the number of groups. A chunk only
+    touches the groups it contains and no rows are re-parsed, so extending the
+    state with an appended tail costs parsing time proportional to the tail.
+    The state is picklable, which lets `AggregationCache` persist and extend it.
+    """
+
+    def __init__(self, group_cols, value_column, approximate=False, compression=100):
+        self.group_cols = list(group_cols)
+        self.value_column = value_column
+        self.approximate = approximate
+        self.compression = compression
+        self._states = {}
+
+    def update(self, chunk):
+        values = pd.to_numeric(chunk[self.value_column], errors='coerce')
+        grouped = values.groupby([chunk[c] for c in self.group_cols], sort=False)
+        keys = grouped.size().index.tolist()  # in ngroup order
+        codes = grouped.ngroup().to_numpy(dtype=float)  # NaN for rows with a NaN key
+        values = values.to_numpy(dtype=float)
+
+        # One stable sort for the whole chunk: rows grouped by key, in arrival order within each group
+        valid = ~np.isnan(codes) & ~np.isnan(values)
+        codes, values = codes[valid].astype(np.int64), values[valid]
+        order = np.argsort(codes, kind='stable')
+        codes, values = codes[order], values[order]
+        counts = np.bincount(codes, minlength=len(keys))
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        if self.approximate:
+            means = np.bincount(codes, weights=values, minlength=len(keys)) / np.maximum(counts, 1)
+            m2 = np.bincount(codes, weights=(values - means[codes]) ** 2, minlength=len(keys))
+
+        for g, key in enumerate(keys):
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = [(0, 0.0, 0.0), _QuantileSketch(self.compression)] \
+                    if self.approximate else []
+            if not counts[g]:
+                continue
+            arr = values[starts[g]:starts[g] + counts[g]]
+            if self.approximate:
+                state[0] = _welford_merge(state[0], counts[g], means[g], m2[g])
+                state[1].update(arr)
+            else:
+                state.append(arr)
+
+    def result(self):
+        """Aggregated DataFrame (group_cols + median + std), or None if no rows were seen."""
+        if not self._states:
+            return None
+
+        keys = list(self._states)
+        agg = pd.DataFrame(keys, columns=self.group_cols)
+        if self.approximate:
+            counts = np.array([self._states[k][0][0] for k in keys], dtype=float)
+            m2 = np.array([self._states[k][0][2] for k in keys], dtype=float)
+            agg['median'] = [self._states[k][1].quantile(0.5) for k in keys]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                agg['std'] = np.where(counts > 1, np.sqrt(m2 / (counts - 1)), np.nan)
+        else:
+            # Compact every group to one array, then reduce them all in one groupby
+            for key in keys:
+                arrays = self._states[key]
+                if len(arrays) > 1:
+                    arrays[:] = [np.concatenate(arrays)]
+            arrays = [self._states[k][0] if self._states[k] else np.empty(0) for k in keys]
+            codes = np.repeat(np.arange(len(keys)), [a.size for a in arrays])
+            stats = pd.Series(np.concatenate(arrays)).groupby(codes).agg(['median', 'std'])
+            stats = stats.reindex(np.arange(len(keys)))
+            agg['median'] = stats['median'].to_numpy()
+            agg['std'] = stats['std'].to_numpy()
+
+        return agg.sort_values(self.group_cols).reset_index(drop=True)
+
+def _aggregate_stream(path, group_cols, value_column, chunksize, approximate=False, compression=100,
+                      dtype=None):
+    """Aggregate a CSV/Parquet/Feather file chunk by chunk (see `_StreamingAggregator`).
+
+    read_csv guesses dtypes per chunk, so a grouping column can parse as numbers
+    in one chunk and as text in another ('1', '2', ... then 'a'), which would
+    make 1 and '1' separate, unsortable keys. When a chunk's key dtypes differ
+    from the first chunk's, the file is read again with the key dtypes pinned to
+    what fits every chunk (`_csv_key_dtypes`), as a whole-file read would infer.
+    """
+    aggregator = _StreamingAggregator(group_cols, value_column, approximate, compression)
+    first = None
+    for chunk in _read_in_chunks(path, list(group_cols) + [value_column], chunksize, dtype):
+        dtypes = {col: chunk[col].dtype for col in group_cols}
+        if first is None:
+            first = dtypes
+        elif dtypes != first and dtype is None and not _is_columnar(path):
+            return _aggregate_stream(path, group_cols, value_column, chunksize, approximate, compression,
+                                     dtype=_csv_key_dtypes(path, group_cols, chunksize))
+        aggregator.update(chunk)
+    return aggregator.result()
+
+def _read_csv_from_offset(path, offset, names, columns, block_bytes=64 * 2**20, dtype=None):
+    """Yield parsed chunks of complete CSV lines from byte `offset` to the end of file.
+
+    Yields (chunk, end_offset) pairs; a trailing partial line (a row still being
+    written) is left for the next call. `dtype` is a dict passed to read_csv for
+    every block; it is read again for each block, so the caller may fill it in
+    from the first chunk.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        pending = b''
+        while True:
+            block = f.read(block_bytes)
+            if not block:
+                break
+            data = pending + block
+            cut = data.rfind(b'\n') + 1
+            if cut == 0:
+                pending = data
+                continue
+            pending = data[cut:]
+            offset += cut
+            chunk = pd.read_csv(io.BytesIO(data[:cut]), header=None, names=names, usecols=columns,
+                                dtype=dtype or None)
+            yield chunk, offset
+
+class AggregationCache:
+    """On-disk cache of aggregation state for growing results files.
+
+    Each entry stores the picklable per-group state of one
+    (results file, group_cols, value_column, mode) combination together with the
+    byte offset, size, mtime and content fingerprints of the source. Refreshing
+    an entry parses only the bytes appended since the last call, with the dtypes
+    the grouping columns got on the first parse, so a key cannot change type
+    (and split into two groups) between refreshes. If the source was truncated
+    or rewritten the entry is rebuilt from scratch; if rows no longer parse with
+    those dtypes it is rebuilt with key dtypes that fit the whole file. Entries are evicted least-recently-used once there
+    are more than `max_entries`.
 
     Args:
-        df: DataFrame or convertible sequence of dicts/rows.
+        cache_dir: directory holding the cache files.
+        max_entries: number of entries kept before LRU eviction.
+    """
+
+    _FINGERPRINT_BYTES = 4096
+    _VERSION = 3  # bump when the entry layout changes; old entries are then ignored and evicted
+
+    def __init__(self, cache_dir, max_entries=64):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    def _entry_path(self, path, group_cols, value_column, approximate, compression):
+        key = repr((self._VERSION, str(Path(path).resolve()), list(group_cols), value_column, approximate, compression))
+        return self.cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()}.pkl"
+
+    def _fingerprint(self, path, offset):
+        """Hashes of the first and last bytes before `offset`, to detect rewrites."""
+        n = self._FINGERPRINT_BYTES
+        with open(path, 'rb') as f:
+            head = f.read(min(n, offset))
+            f.seek(max(0, offset - n))
+            tail = f.read(min(n, offset))
+        return hashlib.sha1(head).hexdigest(), hashlib.sha1(tail).hexdigest()
+
+    def _load(self, entry_path):
+        try:
+            with open(entry_path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    def _save(self, entry_path, entry):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+        self._evict()
+
+    def _evict(self):
+        entries = sorted(self.cache_dir.glob('*.pkl'), key=lambda p: p.stat().st_mtime)
+        for stale in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+    def _is_valid(self, entry, path, stat):
+        if entry is None or stat.st_size < entry['offset']:
+            return False
+        if entry['offset'] == 0:
+            return True
+        return entry['fingerprint'] == self._fingerprint(path, entry['offset'])
+
+    @staticmethod
+    def _new_csv_entry(path, aggregator):
+        """Entry positioned after the header line, or None while the header is incomplete."""
+        with open(path, 'rb') as f:
+            header = f.readline()
+        if not header.endswith(b'\n'):
+            return None
+        names = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+        return {'aggregator': aggregator, 'offset': len(header), 'names': names, 'dtypes': {}}
+
+    @staticmethod
+    def _extend(path, entry, group_cols, value_column, size):
+        """Fold the rows appended after entry['offset'] into the entry's aggregator."""
+        columns = list(group_cols) + [value_column]
+        dtypes = entry['dtypes']
+        with span("cache: parse appended rows", offset=entry['offset'], size=size):
+            for chunk, offset in _read_csv_from_offset(path, entry['offset'], entry['names'], columns, dtype=dtypes):
+                if not dtypes:
+                    dtypes.update({c: chunk[c].dtype for c in group_cols})
+                entry['aggregator'].update(chunk)
+                entry['offset'] = offset
+
+    @profiled()
+    def aggregate(self, path, group_cols, value_column, approximate=False, compression=100):
+        """Aggregated DataFrame (group_cols + median + std) for the current content of `path`.
+
+        Returns None if the file holds no rows.
+        """
+        path = Path(path)
+        stat = path.stat()
+        entry_path = self._entry_path(path, group_cols, value_column, approximate, compression)
+        entry = self._load(entry_path)
+
+        is_csv = not _is_columnar(path)
+        if entry is not None and (entry['size'], entry['mtime']) == (stat.st_size, stat.st_mtime_ns):
+            # Untouched since last refresh
+            os.utime(entry_path)
+            return entry['aggregator'].result()
+
+        if not is_csv or not self._is_valid(entry, path, stat):
+            entry = None
+
+        if entry is None:
+            aggregator = _StreamingAggregator(group_cols, value_column, approximate, compression)
+            if not is_csv:
+                for chunk in _read_in_chunks(path, list(group_cols) + [value_column], 100_000):
+                    aggregator.update(chunk)
+                entry = {'aggregator': aggregator, 'offset': stat.st_size, 'names': None}
+            else:
+                entry = self._new_csv_entry(path, aggregator)
+                if entry is None:
+                    # Header not fully written yet
+                    return None
+
+        if is_csv:
+            try:
+                self._extend(path, entry, group_cols, value_column, stat.st_size)
+            except ValueError:
+                # Rows that do not parse with the key dtypes of the first chunk (e.g. '1', '2',
+                # ... then 'a'): start over with dtypes that fit the whole file
+                aggregator = _StreamingAggregator(group_cols, value_column, approximate, compression)
+                entry = self._new_csv_entry(path, aggregator)
+                if entry is None:
+                    return None
+                entry['dtypes'] = _csv_key_dtypes(path, group_cols)
+                self._extend(path, entry, group_cols, value_column, stat.st_size)
+
+        entry['size'], entry['mtime'] = stat.st_size, stat.st_mtime_ns
+        entry['fingerprint'] = self._fingerprint(path, entry['offset'])
+        with span("cache: save entry"):
+            self._save(entry_path, entry)
+
+        with span("groupby"):
+            return entry['aggregator'].result()
+
+def _format_median_std(agg):
+    """Vectorized 'median ± std' strings with 4 decimals."""
+    return pd.Series(
+        np.char.add(
+            np.char.add(np.char.mod('%.4f', agg['median'].to_numpy(dtype=float)), ' ± '),
+            np.char.mod('%.4f', agg['std'].to_numpy(dtype=float)),
+        ),
+        index=agg.index,
+    )
+
+def _format_labels(agg, group_cols):
+    """Vectorized ', '-joined labels of the grouping columns."""
+    as_str = agg[group_cols].astype(str)
+    label = as_str[group_cols[0]]
+    for col in group_cols[1:]:
+        label = label + ', ' + as_str[col]
+    return label
+
+def _top_k_positions(values, k, ascending=False):
+    """Positions of the k best entries of `values`, found by partial selection.
+
+    NaNs rank last. Every entry tied with the k-th best is kept, so the caller can
+    break ties deterministically on the (small) candidate set.
+    """
+    keyed = np.asarray(values, dtype=float)
+    keyed = keyed.copy() if ascending else -keyed
+    keyed[np.isnan(keyed)] = np.inf
+
+    if k >= keyed.size:
+        return np.arange(keyed.size)
+
+    kth = np.partition(keyed, k - 1)[k - 1]
+    return np.flatnonzero(keyed <= kth)
+
+def select_top_configs(agg, group_cols, n=10, by='median', ascending=False, within=None):
+    """Select the top-n rows of an aggregated table without sorting all of it.
+
+    Candidates are found with partial selection (`np.partition`); only those are
+    sorted, by `by` and then by `group_cols` so ties are broken deterministically.
+
+    Args:
+        agg: aggregated DataFrame (e.g. from `aggregate_and_save_top_configs`).
+        group_cols: grouping columns, used as tie-breakers.
+        n: number of rows to keep (per sub-group if `within` is given).
+        by: column to rank on.
+        ascending: if True, the lowest values rank first (e.g. for 'std').
+        within: optional column or list of columns; ranks inside each sub-group.
+
+    Returns:
+        DataFrame with the selected rows, best first (sub-groups in order of appearance).
+    """
+    if within is None:
+        partitions = [np.arange(len(agg))]
+    else:
+        partitions, _ = split_df(agg, within, as_indices=True)
+
+    sort_cols = [by] + [c for c in group_cols if c != by]
+    selected = []
+    for positions in partitions:
+        candidates = positions[_top_k_positions(agg[by].to_numpy()[positions], n, ascending)]
+        ranked = agg.iloc[candidates].sort_values(
+            by=sort_cols,
+            ascending=[ascending] + [True] * (len(sort_cols) - 1),
+            na_position='last',
+            kind='mergesort',
+        )
+        selected.append(ranked.head(n))
+
+    if not selected:
+        return agg.iloc[:0].reset_index(drop=True)
+    return pd.concat(selected).reset_index(drop=True)
+
+@profiled()
+def aggregate_and_save_top_configs(df, group_cols, value_column, table_dir, n=10,
+                                   chunksize=None, approximate=False, compression=100,
+                                   rankings=None, within=None, cache=None, file_format='csv'):
+    """Aggregate results by hyperparameter columns and save aggregated + top-n tables.
+
+    Args:
+        df: DataFrame, convertible sequence of dicts/rows, or path to a CSV/Parquet/Feather file.
         group_cols: list of columns to group by.
         value_column: the column to compute median and std for.
-        table_dir: Path where CSVs will be saved.
+        table_dir: Path where tables will be saved.
         n: number of top configurations to save (based on median descending).
+        chunksize: rows per chunk when `df` is a path. Only the grouping and value
+            columns are read. Defaults to 100_000.
+        approximate: when reading from a path, estimate medians with a bounded-memory
+            quantile sketch and std with Welford accumulators instead of buffering values.
+        compression: sketch size for `approximate` (higher is more precise).
+        rankings: optional dict {column: ascending} of extra rankings computed from the
+            same aggregation, e.g. {'std': True} for the n most stable configurations.
+            Each is saved as top_{n}_{value_column}_by_{column}.csv.
+        within: optional column or list of columns; top-n is taken per sub-group
+            (e.g. per model family) instead of globally.
+        cache: when `df` is a path, an `AggregationCache` (or True for one in
+            `table_dir / '.agg_cache'`) so repeated calls only parse newly appended rows.
+        file_format: 'csv', 'parquet' or 'feather' for the saved tables. Columnar
+            formats are downcast losslessly and can be read back with `load_table`.
 
     Returns:
-        (agg, top_n) DataFrames for aggregated and top-n results.
+        (agg, top_n) DataFrames for aggregated and top-n (by median) results.
     """
+    if file_format not in _TABLE_SUFFIXES:
+        raise ValueError(f"file_format must be one of {list(_TABLE_SUFFIXES)}, got {file_format!r}.")
+
     # Prepare table dir
     if isinstance(table_dir, str):
         table_dir = Path(table_dir)
         
     table_dir.mkdir(parents=True, exist_ok=True)
 
-    if df is None or len(df) == 0:
-        print("df is empty — nothing to aggregate or plot.")
-        return None, None
-
-    # Ensure DataFrame
-    if not isinstance(df, pd.DataFrame):
+    if isinstance(df, (str, Path)):
+        if cache is True:
+            cache = AggregationCache(table_dir / '.agg_cache')
         try:
-            df = pd.DataFrame(df)
-        except Exception:
-            print("Could not convert df to DataFrame.")
+            if cache is not None:
+                agg = cache.aggregate(df, group_cols, value_column,
+                                      approximate=approximate, compression=compression)
+            else:
+                with span("read + groupby (streaming)", path=df):
+                    agg = _aggregate_stream(df, group_cols, value_column, chunksize or 100_000,
+                                            approximate=approximate, compression=compression)
+        except (OSError, ValueError) as e:
+            print(f"Could not read results from {df}: {e}")
+            return None, None
+        if agg is None:
+            print("df is empty — nothing to aggregate or plot.")
             return None, None
+    else:
+        if df is None or len(df) == 0:
+            print("df is empty — nothing to aggregate or plot.")
+            return None, None
+
+        # Ensure DataFrame
+        if not isinstance(df, pd.DataFrame):
+            try:
+                df = pd.DataFrame(df)
+            except Exception:
+                print("Could not convert df to DataFrame.")
+                return None, None
+
+        # Compute median and std for each grouping tuple
+        with span("groupby", rows=len(df)):
+            agg = _aggregate_frame(df, group_cols, value_column)
 
-    # Compute median and std for each grouping tuple
-    agg = df.groupby(group_cols)[value_column].agg(['median', 'std']).reset_index()
-    agg['median_std'] = agg.apply(lambda r: f"{r['median']:.4f} ± {r['std']:.4f}", axis=1)
+    with span("format strings", groups=len(agg)):
+        agg['median_std'] = _format_median_std(agg)
 
     # Save aggregated table
-    csv_path = table_dir / f"aggregated_{value_column}.csv"
-    agg.to_csv(csv_path, index=False)
-    print(f"Saved aggregated results to {csv_path}")
+    with span("write table", format=file_format, rows=len(agg)):
+        agg_path = _save_table(agg, table_dir, f"aggregated_{value_column}", file_format)
+    print(f"Saved aggregated results to {agg_path}")
 
     # Label for display
-    agg['label'] = agg[group_cols].astype(str).agg(lambda x: ', '.join(x), axis=1)
+    with span("format strings", groups=len(agg)):
+        agg['label'] = _format_labels(agg, group_cols)
 
     # Select top-n
-    agg_sorted = agg.sort_values(by='median', ascending=False).reset_index(drop=True)
-    top_n = agg_sorted.head(n)
-    top_csv = table_dir / f"top_{n}_{value_column}.csv"
-    top_n.to_csv(top_csv, index=False)
-    print(f"Saved top {n} configurations to {top_csv}")
+    with span("select top-n"):
+        top_n = select_top_configs(agg, group_cols, n=n, by='median', ascending=False, within=within)
+    with span("write table", format=file_format, rows=len(top_n)):
+        top_path = _save_table(top_n, table_dir, f"top_{n}_{value_column}", file_format)
+    print(f"Saved top {n} configurations to {top_path}")
+
+    # Extra rankings from the same aggregation
+    for column, ascending in (rankings or {}).items():
+        with span("select top-n", by=column):
+            ranked = select_top_configs(agg, group_cols, n=n, by=column, ascending=ascending, within=within)
+        with span("write table", format=file_format, rows=len(ranked)):
+            ranked_path = _save_table(ranked, table_dir, f"top_{n}_{value_column}_by_{column}", file_format)
+        print(f"Saved top {n} configurations by {column} to {ranked_path}")
+
+    # Print concise view (formatted inside the span, printed outside it)
+    with span("format strings", groups=len(top_n)):
+        try:
+            view = top_n[group_cols + ['median', 'std']].to_string(index=False)
+        except Exception:
+            view = top_n.to_string(index=False)
+    print(view)
+
+    return agg, top_n
+
+def _bootstrap_medians(values, starts, counts, n_boot, rng):
+    """(n_boot, len(counts)) bootstrap medians of the groups values[starts[g]:starts[g] + counts[g]].
+
+    All groups are resampled at once in a padded (n_boot, groups, max count)
+    tensor; padding sorts last so each row's median sits at its own count.
+    """
+    width = int(counts.max())
+    # float32 uniforms are plenty to pick among a group's rows and halve the RNG cost
+    uniforms = rng.random((n_boot, len(counts), width), dtype=np.float32)
+    draws = (uniforms * counts[:, None].astype(np.float32)).astype(np.int64)
+    del uniforms
+    np.minimum(draws, (counts - 1)[:, None], out=draws)  # float32 rounding can reach the count itself
+    samples = values[starts[:, None] + draws]
+    del draws
+    samples[:, np.arange(width)[None, :] >= counts[:, None]] = np.inf
+    samples.sort(axis=-1)
+
+    groups = np.arange(len(counts))
+    return (samples[:, groups, (counts - 1) // 2] + samples[:, groups, counts // 2]) / 2
+
+def _bootstrap_chunks(counts, n_boot, max_elements):
+    """Yield (group positions, replicate slice) covering every group and replicate.
+
+    Groups are taken in order of size so each padded chunk wastes little, and a
+    chunk grows while n_boot * groups * max count stays within `max_elements`.
+    A group too large on its own is split along the replicates instead.
+    """
+    order = np.argsort(counts, kind='stable')
+    i = 0
+    while i < len(order):
+        width = counts[order[i]]
+        if n_boot * width > max_elements:
+            step = max(1, max_elements // width)
+            for b0 in range(0, n_boot, step):
+                yield order[i:i + 1], slice(b0, min(n_boot, b0 + step))
+            i += 1
+            continue
+        j = i + 1
+        while j < len(order) and (j - i + 1) * n_boot * counts[order[j]] <= max_elements:
+            j += 1
+        yield order[i:j], slice(0, n_boot)
+        i = j
+
+@profiled()
+def bootstrap_top_configs(df, group_cols, value_column, n=10, n_boot=1000, ci=0.95, seed=0,
+                          ascending=False, max_memory=4 * 2**20, table_dir=None, file_format='csv'):
+    """Bootstrap confidence intervals of the median and a pairwise comparison of the top-n.
+
+    Companion to `aggregate_and_save_top_configs` for small, noisy samples: every
+    group is resampled `n_boot` times and the spread of the resampled medians
+    shows whether the ranking is more than noise. All groups are resampled in
+    batched NumPy operations, in chunks bounded by `max_memory`.
+
+    Args:
+        df: DataFrame or path to a CSV/Parquet/Feather results file.
+        group_cols: list of columns to group by.
+        value_column: the column whose median is bootstrapped.
+        n: number of top configurations (by median) in the comparison matrix.
+        n_boot: bootstrap replicates per group.
+        ci: confidence level of the percentile intervals.
+        seed: random seed; results are reproducible for a given seed and `max_memory`.
+        ascending: if True, lower values are better.
+        max_memory: approximate bytes for the resample tensors; larger inputs are
+            computed in chunks. Chunks that fit in cache are also the fastest.
+        table_dir: optional Path; if given, both tables are saved there.
+        file_format: 'csv', 'parquet' or 'feather' for the saved tables.
+
+    Returns:
+        (ci_table, beats): ci_table has group_cols, 'count', 'median', 'std',
+        'ci_low' and 'ci_high' for every configuration; beats is a top-n x top-n
+        DataFrame indexed by label where beats.loc[a, b] is the probability that
+        a's median is better than b's (ties count one half).
+    """
+    if isinstance(df, (str, Path)):
+        df = load_table(df, columns=list(group_cols) + [value_column], downcast=False)
+    if df is None or len(df) == 0:
+        print("df is empty — nothing to bootstrap.")
+        return None, None
+
+    agg = _aggregate_frame(df, group_cols, value_column)
+
+    # Rows of each group made contiguous (groups in the order of `agg`)
+    codes = df.groupby(group_cols).ngroup().to_numpy()
+    values = df[value_column].to_numpy(dtype=float)
+    keep = ~np.isnan(codes) & ~np.isnan(values)
+    codes, values = codes[keep].astype(np.int64), values[keep]
+    order = np.argsort(codes, kind='stable')
+    values = values[order]
+    counts = np.bincount(codes, minlength=len(agg))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    agg.insert(len(group_cols), 'count', counts)
+
+    agg['label'] = _format_labels(agg, group_cols)
+    agg['_group'] = np.arange(len(agg))
+    top = select_top_configs(agg, group_cols, n=n, by='median', ascending=ascending)
+    top_groups = top['_group'].to_numpy()
+    top_slot = {g: k for k, g in enumerate(top_groups)}
+    agg = agg.drop(columns='_group')
+
+    rng = np.random.default_rng(seed)
+    alpha = (1 - ci) / 2
+    ci_low = np.full(len(agg), np.nan)
+    ci_high = np.full(len(agg), np.nan)
+    top_medians = np.full((n_boot, len(top_groups)), np.nan)
+    split_medians = {}  # group -> replicate medians of a group split along replicates
+
+    # float32 uniforms, draw indices and gathered samples: 20 bytes per element
+    nonempty = np.flatnonzero(counts > 0)
+    with span("bootstrap resample", n_boot=n_boot, groups=len(nonempty)):
+        for positions, replicates in _bootstrap_chunks(counts[nonempty], n_boot, max(1, max_memory // 20)):
+            groups = nonempty[positions]
+            medians = _bootstrap_medians(values, starts[groups], counts[groups],
+                                         replicates.stop - replicates.start, rng)
+            if replicates != slice(0, n_boot):
+                split_medians.setdefault(groups[0], []).append(medians[:, 0])
+                if replicates.stop < n_boot:
+                    continue
+                groups, medians = groups[:1], np.concatenate(split_medians.pop(groups[0]))[:, None]
+
+            ci_low[groups], ci_high[groups] = np.quantile(medians, [alpha, 1 - alpha], axis=0)
+            for column, group in enumerate(groups):
+                if group in top_slot:
+                    top_medians[:, top_slot[group]] = medians[:, column]
 
-    # Print concise view
+    agg['ci_low'], agg['ci_high'] = ci_low, ci_high
+    ci_table = agg.drop(columns='label')
+
+    # P(a beats b) over replicates, in replicate chunks of at most max_memory booleans
+    k = len(top_groups)
+    wins = np.zeros((k, k))
+    step = max(1, max_memory // max(1, k * k))
+    with span("pairwise comparison", top=k):
+        for b0 in range(0, n_boot, step):
+            block = top_medians[b0:b0 + step]
+            a, b = block[:, :, None], block[:, None, :]
+            better = (a < b) if ascending else (a > b)
+            wins += better.sum(axis=0) + 0.5 * (a == b).sum(axis=0)
+    beats = pd.DataFrame(wins / n_boot, index=top['label'].to_numpy(), columns=top['label'].to_numpy())
+
+    if table_dir is not None:
+        table_dir = Path(table_dir)
+        table_dir.mkdir(parents=True, exist_ok=True)
+        ci_path = _save_table(ci_table, table_dir, f"bootstrap_{value_column}", file_format)
+        print(f"Saved bootstrap intervals to {ci_path}")
+        beats_path = _save_table(beats.rename_axis('label').reset_index(), table_dir,
+                                 f"beats_top_{n}_{value_column}", file_format)
+        print(f"Saved pairwise comparison of the top {n} to {beats_path}")
+
+    return ci_table, beats
+
+def _aggregate_experiment(path, group_cols, value_column, table_dir, n, kwargs):
+    """Worker for `aggregate_experiments`: aggregate one results file and time it."""
+    start = time.perf_counter()
+    log = io.StringIO()
     try:
-        print(top_n[group_cols + ['median', 'std']].to_string(index=False))
-    except Exception:
-        print(top_n.to_string(index=False))
+        # Keep worker output together instead of interleaving it across processes
+        with contextlib.redirect_stdout(log):
+            agg, _ = aggregate_and_save_top_configs(str(path), group_cols, value_column, table_dir, n=n, **kwargs)
+        if agg is not None:
+            status, error = 'ok', None
+        else:
+            lines = log.getvalue().strip().splitlines()
+            status, error = 'error', lines[-1] if lines else "nothing aggregated"
+    except Exception as e:
+        agg, status, error = None, 'error', f"{type(e).__name__}: {e}"
+    return agg, status, error, time.perf_counter() - start
+
+@profiled()
+def aggregate_experiments(paths, group_cols, value_column, table_root=None, n=10, max_workers=None, **kwargs):
+    """Aggregate many results files in parallel and build a cross-experiment leaderboard.
+
+    Every file is parsed and aggregated in a worker process with
+    `aggregate_and_save_top_configs`, which still writes its aggregated and top-n
+    tables. A file that fails is reported and skipped instead of failing the batch.
+
+    Args:
+        paths: list of results file paths, or a glob pattern such as
+            'RESULTS_ROOT/*/results_grid_search.csv'.
+        group_cols: list of columns to group by.
+        value_column: the column to compute median and std for.
+        table_root: where per-experiment tables go, in table_root / <experiment>.
+            Defaults to the folder of each results file. The experiment name is the
+            parent folder's name; when several files share it, each gets a short hash
+            of its folder's path appended ('<name>-<hash>') so their tables and
+            leaderboard rows stay apart.
+        n: number of top configurations per experiment and in the leaderboard.
+        max_workers: number of worker processes (1 runs everything in this process).
+        **kwargs: forwarded to `aggregate_and_save_top_configs` (e.g. chunksize, cache).
+
+    Returns:
+        (leaderboard, report): the top-n configurations across all experiments with an
+        'experiment' column, and one row per file with its status, error and seconds.
+    """
+    if isinstance(paths, (str, Path)):
+        paths = sorted(glob.glob(str(paths), recursive=True))
+    paths = [Path(p) for p in paths]
+
+    name_counts = {}
+    for path in dict.fromkeys(paths):
+        name_counts[path.parent.name] = name_counts.get(path.parent.name, 0) + 1
+
+    jobs = {}
+    for path in paths:
+        experiment = path.parent.name
+        if name_counts[experiment] > 1:
+            digest = hashlib.sha1(str(path.parent.resolve()).encode()).hexdigest()[:8]
+            experiment = f"{experiment}-{digest}"
+        table_dir = path.parent if table_root is None else Path(table_root) / experiment
+        jobs[path] = (experiment, table_dir)
+
+    results = {}
+    if max_workers == 1:
+        for path, (_, table_dir) in jobs.items():
+            results[path] = _aggregate_experiment(path, group_cols, value_column, table_dir, n, kwargs)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(_aggregate_experiment, path, group_cols, value_column, table_dir, n, kwargs): path
+                for path, (_, table_dir) in jobs.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    # The worker itself died (e.g. killed or out of memory)
+                    results[futures[future]] = (None, 'error', f"{type(e).__name__}: {e}", float('nan'))
+
+    aggs = []
+    report = []
+    for path, (experiment, _) in jobs.items():
+        agg, status, error, seconds = results[path]
+        report.append({'experiment': experiment, 'path': str(path), 'status': status,
+                       'error': error, 'seconds': seconds})
+        if agg is not None:
+            aggs.append(agg.assign(experiment=experiment))
+
+    report = pd.DataFrame(report, columns=['experiment', 'path', 'status', 'error', 'seconds'])
+    for row in report.itertuples():
+        if row.status == 'error':
+            print(f"Skipped {row.path}: {row.error}")
+
+    if not aggs:
+        return None, report
+
+    combined = pd.concat(aggs, ignore_index=True)
+    combined = combined[['experiment'] + [c for c in combined.columns if c != 'experiment']]
+    leaderboard = select_top_configs(combined, ['experiment'] + list(group_cols), n=n)
 
-    return agg, top_n
\ No newline at end of file
+    return leaderboard, report
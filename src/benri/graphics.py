@@ -2,11 +2,352 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from .data import split_df
+import io
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from .data import split_df, _read_csv_from_offset
+from .profiling import profiled, span
 
+def _hue_order(df_list, separation):
+    """Hue levels in seaborn's order: sorted if numeric, else order of appearance."""
+    levels = pd.Series(pd.concat([df[separation] for df in df_list], ignore_index=True).unique()).dropna()
+    if pd.api.types.is_numeric_dtype(levels):
+        levels = levels.sort_values()
+    return levels.tolist()
+
+def _budget_mask(codes, budget, rng):
+    """Boolean mask keeping a uniform random sample of at most `budget` rows per group code."""
+    if budget is None or codes.size == 0:
+        return np.ones(codes.size, dtype=bool)
+    # Sort by (group, random key) and keep the first `budget` rows of every group
+    order = np.lexsort((rng.random(codes.size), codes))
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, codes.size]))
+    mask = np.zeros(codes.size, dtype=bool)
+    mask[order[np.arange(codes.size) - group_start < budget]] = True
+    return mask
+
+def _box_stats(df, value_column, separation=None, whis=1.5, point_budget=None, strip=False, seed=0):
+    """Boxplot statistics of `value_column` for every `separation` value of one DataFrame.
+
+    Quartiles come from a single groupby-quantile; whiskers and fliers follow
+    matplotlib's rule (furthest points within `whis` * IQR of the box).
+    Statistics always use all the data; with `point_budget` only the drawn points
+    (fliers, and the strip overlay if `strip`) are sampled down per group.
+
+    Returns:
+        dict {separation value (or None): stats dict accepted by `Axes.bxp`, plus
+        'n_fliers' and, with `strip`, 'points' and 'n'}.
+    """
+    if point_budget is not None and point_budget < 0:
+        raise ValueError(f"point_budget must be >= 0, got {point_budget}")
+    values = df[value_column].to_numpy(dtype=float)
+    if separation is None:
+        codes, uniques = np.zeros(len(values), dtype=np.int64), [None]
+    else:
+        codes, uniques = pd.factorize(df[separation])
+
+    keep = ~np.isnan(values) & (codes >= 0)
+    values, codes = values[keep], codes[keep]
+    if values.size == 0:
+        return {}
+
+    by_group = pd.Series(values).groupby(codes)
+    quartiles = by_group.quantile([0.25, 0.5, 0.75]).unstack()
+    q1, med, q3 = (quartiles[q].to_numpy() for q in (0.25, 0.5, 0.75))
+    present = quartiles.index.to_numpy()
+
+    # Per-row whisker bounds through the group codes
+    lookup = np.full(len(uniques), -1)
+    lookup[present] = np.arange(len(present))
+    rows = lookup[codes]
+    iqr = q3 - q1
+    inside = (values >= (q1 - whis * iqr)[rows]) & (values <= (q3 + whis * iqr)[rows])
+
+    inside_values = pd.Series(np.where(inside, values, np.nan))
+    whislo = inside_values.groupby(codes).min().reindex(present).to_numpy()
+    whishi = inside_values.groupby(codes).max().reindex(present).to_numpy()
+    whislo = np.where(np.isnan(whislo) | (whislo > q1), q1, whislo)
+    whishi = np.where(np.isnan(whishi) | (whishi < q3), q3, whishi)
+
+    rng = np.random.default_rng(seed)
+    outside = (values < whislo[rows]) | (values > whishi[rows])
+    n_fliers = np.bincount(codes[outside], minlength=len(uniques))
+    if point_budget is not None and point_budget < 2:
+        outside[outside] = _budget_mask(codes[outside], point_budget, rng)
+    elif point_budget is not None and outside.any():
+        # Keep each group's extreme fliers so the sampled plot spans the same range
+        flier_pos = pd.Series(values[outside], index=np.flatnonzero(outside))
+        extremes = np.r_[flier_pos.groupby(codes[outside]).idxmin().to_numpy(),
+                         flier_pos.groupby(codes[outside]).idxmax().to_numpy()]
+        outside[outside] = _budget_mask(codes[outside], point_budget - 2, rng)
+        outside[extremes] = True
+    fliers = pd.Series(values[outside]).groupby(codes[outside]).apply(np.asarray).to_dict()
+
+    stats = {
+        uniques[code]: {
+            'med': med[i], 'q1': q1[i], 'q3': q3[i],
+            'whislo': whislo[i], 'whishi': whishi[i],
+            'fliers': fliers.get(code, np.empty(0)),
+            'n_fliers': int(n_fliers[code]),
+        }
+        for i, code in enumerate(present)
+    }
+
+    if strip:
+        counts = np.bincount(codes, minlength=len(uniques))
+        sampled = _budget_mask(codes, point_budget, rng)
+        points = pd.Series(values[sampled]).groupby(codes[sampled]).apply(np.asarray).to_dict()
+        for code in present:
+            stats[uniques[code]]['points'] = points.get(code, np.empty(0))
+            stats[uniques[code]]['n'] = int(counts[code])
+
+    return stats
+
+def _draw_box_stats(ax, stats, labels, hue_levels, plot_props, legend_title=None, width=0.8, seed=0):
+    """Draw precomputed box statistics with `Axes.bxp`, dodged like seaborn.
+
+    `stats` maps (label, hue) to a stats dict; hue is None when there is no separation.
+    Strip points (if present in the stats) are jittered inside each box's width.
+
+    Returns:
+        (drawn, total) number of individual points drawn vs. available.
+    """
+    n_hues = len(hue_levels)
+    box_width = width / n_hues
+    palette = sns.color_palette('Set2', n_colors=n_hues if hue_levels != [None] else len(labels))
+
+    boxes, positions, colors = [], [], []
+    for i, label in enumerate(labels):
+        for j, hue in enumerate(hue_levels):
+            box = stats.get((label, hue))
+            if box is None:
+                continue
+            boxes.append(box)
+            positions.append(i - width / 2 + box_width * (j + 0.5))
+            colors.append(palette[i] if hue is None else palette[j])
+
+    boxprops = plot_props['boxprops']
+    artists = ax.bxp(
+        boxes, positions=positions, widths=box_width, patch_artist=True,
+        boxprops=boxprops,
+        whiskerprops=plot_props['whiskerprops'],
+        capprops=plot_props['capprops'],
+        medianprops=plot_props['medianprops'],
+        flierprops=dict(plot_props['flierprops'], linestyle='none'),
+        manage_ticks=False,
+    )
+    # seaborn draws boxes with saturation=.75
+    for patch, color in zip(artists['boxes'], colors):
+        patch.set_facecolor(sns.desaturate(color, 0.75))
+
+    drawn = sum(len(box['fliers']) for box in boxes)
+    total = sum(box.get('n_fliers', len(box['fliers'])) for box in boxes)
+
+    rng = np.random.default_rng(seed)
+    for box, position in zip(boxes, positions):
+        if 'points' not in box:
+            continue
+        points = box['points']
+        jitter = rng.uniform(-box_width * 0.35, box_width * 0.35, size=len(points))
+        # Rasterized so that vector outputs stay small however many points there are
+        ax.scatter(position + jitter, points, s=4, color=plot_props['flierprops']['markerfacecolor'],
+                   alpha=0.4, linewidths=0, zorder=3, rasterized=True)
+        drawn += len(points)
+        total += box['n']
+
+    ax.set_xticks(np.arange(len(labels)))
+    ax.set_xticklabels(labels)
+    ax.set_xlim(-0.5, len(labels) - 0.5)
+    ax.xaxis.grid(False)  # seaborn hides the grid along the categorical axis
+
+    if hue_levels != [None]:
+        handles = [
+            plt.Rectangle((0, 0), 1, 1, facecolor=sns.desaturate(palette[j], 0.75), edgecolor=boxprops.get('edgecolor'))
+            for j in range(n_hues)
+        ]
+        ax.legend(handles, [str(h) for h in hue_levels], title=legend_title)
+
+    return drawn, total
+
+def _style_dict(TEXT_COLOR, BACKGROUND_COLOR):
+    """Style dictionary for the dark background and white text."""
+    return {
+        "axes.facecolor": BACKGROUND_COLOR,    # Dark background
+        "figure.facecolor":BACKGROUND_COLOR,   # Dark background
+        "text.color": TEXT_COLOR,         # Default text
+        "axes.labelcolor": TEXT_COLOR,    # Axis labels
+        "axes.titlecolor": TEXT_COLOR,    # Title
+        "xtick.color": TEXT_COLOR,        # X-axis tick labels
+        "ytick.color": TEXT_COLOR,        # Y-axis tick labels
+        "grid.color": TEXT_COLOR,          # Lighter grid for contrast
+        "axes.edgecolor": TEXT_COLOR      # Plot border/spines
+    }
+
+def _draw_boxplots(ax, df_list, labels, value_column='test_auc', separation=None,
+                   horizontals=[], trace_line=False, title = "Boxplot comparison of different experiments", X_axis=None, Y_axis=None,
+                   TEXT_COLOR='white', BOX_COLOR='#E0E0E0', BACKGROUND_COLOR = "#1F1F1F",
+                   precompute_stats=False, point_budget=None, strip=False):
+    """Draws the boxplot figure of `plot_boxplots` on the given Axes (no pyplot state)."""
+    # Sampling the drawn points needs the statistics path
+    precompute_stats = precompute_stats or point_budget is not None or strip
+    # --- Define props for ALL boxplot elements ---
+    # These will be passed to sns.boxplot to make all lines white
+    plot_props = {
+        "boxprops": dict(edgecolor=BOX_COLOR),
+        "whiskerprops": dict(color=BOX_COLOR),
+        "capprops": dict(color=BOX_COLOR),
+        "medianprops": dict(color=BOX_COLOR, linewidth=1), # Make median slightly thicker
+        "flierprops": dict(markerfacecolor=BOX_COLOR, 
+                           markeredgecolor=BOX_COLOR, 
+                           marker='.') # Use a small dot for outliers
+    }
+
+    combined = []
+    medians = []
+    box_stats = {}
+
+    # --- 1. Data Preparation ---
+    with span("boxplot: box stats" if precompute_stats else "boxplot: medians", frames=len(df_list)):
+        for i, df in enumerate(df_list):
+            if precompute_stats:
+                # One vectorized pass per frame; the medians come from the same stats
+                group_stats = _box_stats(df, value_column, separation, point_budget=point_budget, strip=strip)
+                for sep_val, stats in group_stats.items():
+                    box_stats[(labels[i], sep_val)] = stats
+                    if separation is None:
+                        medians.append((labels[i], stats['med']))
+                    else:
+                        medians.append((labels[i], sep_val, stats['med']))
+                continue
+
+            temp = df.copy()
+            temp['DataFrame'] = labels[i]
+            combined.append(temp)
+
+            if separation is None:
+                medians.append((labels[i], temp[value_column].median()))
+            else:
+                for sep_val in temp[separation].unique():
+                    m = temp.loc[temp[separation] == sep_val, value_column].median()
+                    medians.append((labels[i], sep_val, m))
+
+    if separation is None:
+        medians_df = pd.DataFrame(medians, columns=['DataFrame', 'Median'])
+    else:
+        medians_df = pd.DataFrame(medians, columns=['DataFrame', separation, 'Median'])
+
+    if not precompute_stats:
+        with span("boxplot: concat", frames=len(combined)):
+            all_data = pd.concat(combined, ignore_index=True)
+
+    # --- 2. Plotting the Boxplot ---
+    with span("boxplot: draw" if precompute_stats else "boxplot: seaborn"):
+        if precompute_stats:
+            hue_levels = [None] if separation is None else _hue_order(df_list, separation)
+            drawn, total = _draw_box_stats(ax, box_stats, labels, hue_levels, plot_props, legend_title=separation)
+            if drawn < total:
+                ax.text(0.995, 0.01, f"{drawn:,} of {total:,} points drawn", transform=ax.transAxes,
+                        ha='right', va='bottom', fontsize=8, color=TEXT_COLOR, alpha=0.8)
+        elif separation is None:
+            sns.boxplot(
+                data=all_data,
+                ax=ax,
+                x='DataFrame',
+                y=value_column,
+                hue = 'DataFrame',
+                legend = False,
+                palette='Set2',
+                order=labels,
+                **plot_props # Unpack all the white-line props
+            )
+            if ax.get_legend() is not None:
+                ax.get_legend().remove()
+        else:
+            sns.boxplot(
+                data=all_data,
+                ax=ax,
+                x='DataFrame',
+                y=value_column,
+                hue=separation,
+                palette='Set2',
+                order=labels,
+                **plot_props # Unpack all the white-line props
+            )
+
+    if separation is not None:
+        # --- 3. Plotting the Trace Line (if requested) ---
+        if trace_line:
+            x = np.arange(len(labels))
+            
+            hue_levels = sorted(medians_df[separation].unique())
+            palette = sns.color_palette("Set2", n_colors=len(hue_levels))
+            color_map = dict(zip(hue_levels, palette))
+
+            for i, sep_val in enumerate(hue_levels):
+                medians_for_hue = medians_df[medians_df[separation] == sep_val]
+                
+                ordered_medians = pd.DataFrame({'DataFrame': labels})
+                ordered_medians = ordered_medians.merge(
+                    medians_for_hue, 
+                    on='DataFrame', 
+                    how='left'
+                )
+                y = ordered_medians['Median'].values 
+
+                ax.plot(
+                    x, y, 
+                    marker='.',        
+                    linestyle='--',    
+                    color=color_map[sep_val], 
+                    zorder=10,         
+                    alpha=0.9
+                )
+
+    # --- 4. Plot Finalization and Styling (All Text White) ---
+    
+    ax.set_title(title, color=TEXT_COLOR, fontsize=16, pad=20)
+
+    x_label = X_axis if X_axis is not None else 'DataFrame'
+    y_label = Y_axis if Y_axis is not None else value_column
+    ax.set_xlabel(x_label, color=TEXT_COLOR, fontsize=12, labelpad=15)
+    ax.set_ylabel(y_label, color=TEXT_COLOR, fontsize=12, labelpad=15)
+
+    ax.tick_params(axis='x', colors=TEXT_COLOR, labelsize=10)
+    ax.tick_params(axis='y', colors=TEXT_COLOR, labelsize=10)
+    
+    for spine in ax.spines.values():
+        spine.set_edgecolor(TEXT_COLOR)
+
+    for h_val in horizontals:
+        ax.axhline(y=h_val, color=TEXT_COLOR, linestyle=':', linewidth=1, alpha=0.8)
+
+    if separation is not None:
+        legend = ax.get_legend()
+        if legend:
+            title_obj = legend.get_title()
+            if title_obj:
+                title_obj.set_color(TEXT_COLOR)
+            
+            for text in legend.get_texts():
+                text.set_color(TEXT_COLOR)
+            
+            frame = legend.get_frame()
+            frame.set_facecolor(BACKGROUND_COLOR) 
+            frame.set_edgecolor(TEXT_COLOR)
+
+@profiled()
 def plot_boxplots(df_list, labels, value_column='test_auc', separation=None, split = None,
                   horizontals=[], trace_line=False, title = "Boxplot comparison of different experiments", X_axis=None, Y_axis=None, 
-                  TEXT_COLOR='white', BOX_COLOR='#E0E0E0', BACKGROUND_COLOR = "#1F1F1F"
+                  TEXT_COLOR='white', BOX_COLOR='#E0E0E0', BACKGROUND_COLOR = "#1F1F1F",
+                  precompute_stats=False, point_budget=None, strip=False
                   ):
     """
     Plots boxplots of `value_column` across DataFrames (one box per DataFrame),
@@ -16,15 +357,25 @@ def plot_boxplots(df_list, labels, value_column='test_auc', separation=None, spl
     New args:
     - X_axis: if not None, sets the x-axis label to this value
     - Y_axis: if not None, sets the y-axis label to this value
+    - precompute_stats: if True, computes quartiles, whiskers and fliers once per
+      (DataFrame, separation) group and draws them with matplotlib's `bxp`
+      instead of concatenating all raw data for seaborn. Use for large frames.
+    - point_budget: if not None, at most this many fliers (and strip points) are
+      drawn per box, sampled at random; box statistics still use all the data and
+      the figure notes how many points were drawn. With a budget of 2 or more the
+      lowest and highest flier of each box are always among them; 0 draws no
+      points, and a negative budget raises ValueError. Implies precompute_stats.
+    - strip: if True, overlays the (sampled) raw points as a jittered strip.
     """
     if split != None:
-        # This recursive part assumes a function df_list_f exists in your scope
+        # One figure per DataFrame, split by `split` (column name or list of columns)
         try:
             for i, df in enumerate(df_list):
                 df_list2, labels2 = split_df(df=df, split_by = split)
                 plot_boxplots(df_list = df_list2, labels = labels2, value_column=value_column, separation=separation, split = None,
                       horizontals=horizontals, trace_line=trace_line, title = title + "  " + labels[i] , X_axis=X_axis, Y_axis=Y_axis,
-                      TEXT_COLOR=TEXT_COLOR, BOX_COLOR=BOX_COLOR, BACKGROUND_COLOR=BACKGROUND_COLOR)
+                      TEXT_COLOR=TEXT_COLOR, BOX_COLOR=BOX_COLOR, BACKGROUND_COLOR=BACKGROUND_COLOR,
+                      precompute_stats=precompute_stats, point_budget=point_budget, strip=strip)
         except NameError as e:
             print("Error: The 'split' feature requires a function named 'df_list_f' to be defined.")
             print(e)
@@ -32,144 +383,450 @@ def plot_boxplots(df_list, labels, value_column='test_auc', separation=None, spl
     else:
         
         print(f'Background_color: {BACKGROUND_COLOR}')
-        # Define the style dictionary for the dark background and white text
-        style_dict = {
-            "axes.facecolor": BACKGROUND_COLOR,    # Dark background
-            "figure.facecolor":BACKGROUND_COLOR,   # Dark background
-            "text.color": TEXT_COLOR,         # Default text
-            "axes.labelcolor": TEXT_COLOR,    # Axis labels
-            "axes.titlecolor": TEXT_COLOR,    # Title
-            "xtick.color": TEXT_COLOR,        # X-axis tick labels
-            "ytick.color": TEXT_COLOR,        # Y-axis tick labels
-            "grid.color": TEXT_COLOR,          # Lighter grid for contrast
-            "axes.edgecolor": TEXT_COLOR      # Plot border/spines
-        }
-        
-        # --- Define props for ALL boxplot elements ---
-        # These will be passed to sns.boxplot to make all lines white
-        plot_props = {
-            "boxprops": dict(edgecolor=BOX_COLOR),
-            "whiskerprops": dict(color=BOX_COLOR),
-            "capprops": dict(color=BOX_COLOR),
-            "medianprops": dict(color=BOX_COLOR, linewidth=1), # Make median slightly thicker
-            "flierprops": dict(markerfacecolor=BOX_COLOR, 
-                               markeredgecolor=BOX_COLOR, 
-                               marker='.') # Use a small dot for outliers
-        }
 
         # Use 'with' to apply the style temporarily
-        with sns.axes_style("darkgrid", style_dict):
+        with sns.axes_style("darkgrid", _style_dict(TEXT_COLOR, BACKGROUND_COLOR)):
+            plt.figure(figsize=(12, 6))
+            _draw_boxplots(plt.gca(), df_list, labels, value_column=value_column, separation=separation,
+                           horizontals=horizontals, trace_line=trace_line, title=title, X_axis=X_axis, Y_axis=Y_axis,
+                           TEXT_COLOR=TEXT_COLOR, BOX_COLOR=BOX_COLOR, BACKGROUND_COLOR=BACKGROUND_COLOR,
+                           precompute_stats=precompute_stats, point_budget=point_budget, strip=strip)
 
-            combined = []
-            medians = []
+        # --- 5. Show the Plot ---
+        with span("boxplot: layout"):
+            plt.tight_layout() 
+        plt.show()
 
-            # --- 1. Data Preparation ---
-            for i, df in enumerate(df_list):
-                temp = df.copy()
-                temp['DataFrame'] = labels[i]
-                combined.append(temp)
+def _render_figure(stem, formats, dpi, df_list, labels, plot_kwargs):
+    """Worker for `render_boxplots`: draw one figure with the Agg canvas and save it."""
+    TEXT_COLOR = plot_kwargs.get('TEXT_COLOR', 'white')
+    BACKGROUND_COLOR = plot_kwargs.get('BACKGROUND_COLOR', "#1F1F1F")
 
-                if separation is None:
-                    medians.append((labels[i], temp[value_column].median()))
-                else:
-                    for sep_val in temp[separation].unique():
-                        m = temp.loc[temp[separation] == sep_val, value_column].median()
-                        medians.append((labels[i], sep_val, m))
+    with sns.axes_style("darkgrid", _style_dict(TEXT_COLOR, BACKGROUND_COLOR)):
+        # A bare Figure with its own Agg canvas never touches pyplot's global state
+        fig = Figure(figsize=(12, 6))
+        FigureCanvasAgg(fig)
+        _draw_boxplots(fig.add_subplot(), df_list, labels, **plot_kwargs)
 
-            if separation is None:
-                medians_df = pd.DataFrame(medians, columns=['DataFrame', 'Median'])
-            else:
-                medians_df = pd.DataFrame(medians, columns=['DataFrame', separation, 'Median'])
+    with span("boxplot: layout"):
+        fig.tight_layout()
+    paths = []
+    for fmt in formats:
+        path = f"{stem}.{fmt}"
+        with span("boxplot: save", format=fmt):
+            fig.savefig(path, format=fmt, dpi=dpi, facecolor=fig.get_facecolor())
+        paths.append(path)
 
-            all_data = pd.concat(combined, ignore_index=True)
+    fig.clear()
+    return paths
 
-            plt.figure(figsize=(12, 6))
+def _slugify(text):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(text)).strip('_') or 'figure'
 
-            # --- 2. Plotting the Boxplot ---
-            if separation is None:
-                ax = sns.boxplot(
-                    data=all_data,
-                    x='DataFrame',
-                    y=value_column,
-                    hue = 'DataFrame',
-                    legend = False,
-                    palette='Set2',
-                    order=labels,
-                    **plot_props # Unpack all the white-line props
-                )
-                if ax.get_legend() is not None:
-                    ax.get_legend().remove()
+@profiled()
+def render_boxplots(df_list, labels, output_dir, split=None, formats=('png',), max_workers=None, dpi=100,
+                    title="Boxplot comparison of different experiments", **plot_kwargs):
+    """
+    Headless batch version of `plot_boxplots`: renders figures to files instead of showing them.
+
+    Uses the Agg canvas and the object-oriented Figure API, so it is safe on servers
+    without a display and can render the figures of `split` mode in parallel processes.
+    Figures are cleared after saving, so long sweeps do not accumulate memory.
+
+    Args:
+    - output_dir: directory for the files (created if missing)
+    - split: like in `plot_boxplots`, one figure per DataFrame split by this column(s);
+      if None a single figure is rendered
+    - formats: file formats to write, e.g. ('png', 'svg', 'pdf')
+    - max_workers: number of worker processes (1 renders in this process)
+    - dpi: resolution for raster formats
+    - title and **plot_kwargs: forwarded to the drawing code, as in `plot_boxplots`
+
+    Returns:
+    - list of written file paths, in figure order
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = []
+    if split is None:
+        jobs.append((output_dir / _slugify(title), df_list, labels, dict(plot_kwargs, title=title)))
+    else:
+        for i, df in enumerate(df_list):
+            df_list2, labels2 = split_df(df=df, split_by=split)
+            fig_title = title + "  " + labels[i]
+            jobs.append((output_dir / f"{i:03d}_{_slugify(labels[i])}", df_list2, labels2,
+                         dict(plot_kwargs, title=fig_title)))
+
+    if max_workers == 1 or len(jobs) == 1:
+        results = [_render_figure(str(stem), formats, dpi, dl, lb, kw) for stem, dl, lb, kw in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_render_figure, str(stem), formats, dpi, dl, lb, kw) for stem, dl, lb, kw in jobs]
+            results = [future.result() for future in futures]
+
+    return [path for paths in results for path in paths]
+
+@profiled()
+def render_resource_usage(samples, output=None, title="Resource usage", dpi=100,
+                          TEXT_COLOR='white', BACKGROUND_COLOR="#1F1F1F"):
+    """
+    Headless chart of a process' CPU, memory and IO over time (Agg canvas, no pyplot).
+
+    Args:
+        samples: structured array or DataFrame with 'time' (epoch seconds), 'cpu' (%),
+            'rss' and 'swap' (bytes), 'read' and 'write' (cumulative bytes), as
+            returned by `ResourceSampler.series()`.
+        output: file path or binary file-like object; if None the PNG bytes are returned.
+        title: figure title.
+        dpi: resolution.
+
+    Returns:
+        PNG bytes if `output` is None, else None.
+    """
+    samples = pd.DataFrame(samples)
+    minutes = (samples['time'] - samples['time'].iloc[0]).to_numpy() / 60
+    elapsed = np.diff(samples['time'].to_numpy(), prepend=np.nan)
+    elapsed[elapsed <= 0] = np.nan
+
+    with sns.axes_style("darkgrid", _style_dict(TEXT_COLOR, BACKGROUND_COLOR)):
+        fig = Figure(figsize=(8, 6))
+        FigureCanvasAgg(fig)
+        ax_cpu, ax_mem, ax_io = fig.subplots(3, 1, sharex=True)
+
+    ax_cpu.plot(minutes[1:], samples['cpu'].to_numpy()[1:], color='#4FC3F7')
+    ax_cpu.set_ylabel("CPU %")
+    ax_cpu.set_title(title)
+
+    ax_mem.plot(minutes, samples['rss'].to_numpy() / 2**30, color='#AED581', label="RSS")
+    if samples['swap'].max() > 0:
+        ax_mem.plot(minutes, samples['swap'].to_numpy() / 2**30, color='#FF8A65', label="swap")
+        ax_mem.legend(facecolor=BACKGROUND_COLOR, labelcolor=TEXT_COLOR)
+    ax_mem.set_ylabel("GiB")
+
+    for column, color in (('read', '#FFD54F'), ('write', '#BA68C8')):
+        rate = np.clip(np.diff(samples[column].to_numpy(), prepend=np.nan) / elapsed, 0, None)
+        ax_io.plot(minutes, rate / 2**20, color=color, label=column)
+    ax_io.set_ylabel("MiB/s")
+    ax_io.set_xlabel("minutes")
+    ax_io.legend(facecolor=BACKGROUND_COLOR, labelcolor=TEXT_COLOR)
+
+    fig.tight_layout()
+    buffer = io.BytesIO() if output is None else output
+    fig.savefig(buffer, format='png', dpi=dpi, facecolor=fig.get_facecolor())
+    fig.clear()
+    return buffer.getvalue() if output is None else None
+
+class _MinMaxDecimator:
+    """Min and max of y per x bin, for a fixed number of bins (one per pixel column).
+
+    The bins are sized from the x range of the data and double in width
+    (merging neighbours) whenever new x values fall outside the grid on either
+    side, so memory and drawing cost stay constant however many points are
+    added and in whatever x order. Drawing the min and max of every bin keeps
+    the envelope of the curve exact at that width. Until two distinct x values
+    have been seen, the single column's min and max are kept as they are.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns + columns % 2
+        self.x0 = None
+        self.width = None
+        self.lo = np.full((self.columns, 2), np.nan)  # (x, y) of each bin's minimum
+        self.hi = np.full((self.columns, 2), np.nan)  # (x, y) of each bin's maximum
+
+    def update(self, x, y):
+        if x.size == 0:
+            return
+        if self.x0 is None:
+            # Fold in the points held while all x were equal
+            held = ~np.isnan(self.lo[:1, 1])
+            x = np.concatenate([x, self.lo[:1, 0][held], self.hi[:1, 0][held]])
+            y = np.concatenate([y, self.lo[:1, 1][held], self.hi[:1, 1][held]])
+            x_min, x_max = float(x.min()), float(x.max())
+            if x_max == x_min:
+                lowest, highest = np.argmin(y), np.argmax(y)
+                self.lo[0] = x[lowest], y[lowest]
+                self.hi[0] = x[highest], y[highest]
+                return
+            self.lo[:], self.hi[:] = np.nan, np.nan
+            self.x0 = x_min
+            self.width = (x_max - x_min) / (self.columns - 1)
+        self._cover(float(x.min()), float(x.max()))
+
+        bins = np.clip(((x - self.x0) // self.width).astype(np.int64), 0, self.columns - 1)
+        order = np.lexsort((y, bins))
+        bins, x, y = bins[order], x[order], y[order]
+        boundary = bins[1:] != bins[:-1]
+        first, last = np.r_[True, boundary], np.r_[boundary, True]
+        self._fold(self.lo, bins[first], x[first], y[first], np.less)
+        self._fold(self.hi, bins[last], x[last], y[last], np.greater)
+
+    def _cover(self, x_min, x_max):
+        """Coarsen and shift the grid until [x_min, x_max] and the stored bins fit in it."""
+        while True:
+            filled = np.flatnonzero(~np.isnan(self.lo[:, 1]))
+            left = max(0, int(np.ceil((self.x0 - x_min) / self.width)))
+            right = max(int((x_max - self.x0) // self.width), filled[-1] if filled.size else 0)
+            if left + right < self.columns:
+                break
+            self._coarsen()
+        if left:
+            # Move the grid origin left by whole bins; stored bins move right
+            for store in (self.lo, self.hi):
+                store[left:] = store[:self.columns - left].copy()
+                store[:left] = np.nan
+            self.x0 -= left * self.width
+
+    @staticmethod
+    def _fold(store, bins, x, y, better):
+        current = store[bins, 1]
+        take = np.isnan(current) | better(y, current)
+        store[bins[take]] = np.column_stack([x[take], y[take]])
+
+    def _coarsen(self):
+        """Merge bin pairs: same number of bins, twice as wide."""
+        half = self.columns // 2
+        for store, better in ((self.lo, np.less), (self.hi, np.greater)):
+            a, b = store[0::2], store[1::2]
+            take_b = np.isnan(a[:, 1]) | better(b[:, 1], a[:, 1])
+            store[:half] = np.where(take_b[:, None], b, a)
+            store[half:] = np.nan
+        self.width *= 2
+
+    def points(self):
+        """(x, y) to draw: each filled bin's min and max, in x order."""
+        filled = ~np.isnan(self.lo[:, 1])
+        lo, hi = self.lo[filled], self.hi[filled]
+        swap = (hi[:, 0] < lo[:, 0])[:, None]
+        pairs = np.stack([np.where(swap, hi, lo), np.where(swap, lo, hi)], axis=1).reshape(-1, 2)
+        return pairs[:, 0], pairs[:, 1]
+
+class LiveCurves:
+    """
+    Live line plot of a results CSV that is still being written.
+
+    Each `poll()` reads only the complete rows appended since the last call and
+    folds them into per-curve min/max decimators (one bin per pixel column), so
+    memory and redraw time stay flat as the file grows to millions of rows. The
+    existing Line2D artists are updated in place. On interactive backends only
+    the axes area is re-blitted; the figure is fully redrawn only when a new
+    curve appears or the data leaves the current limits. `render_png()` renders
+    the current state headlessly (for the bot).
+
+    Args:
+        path: results CSV (header line first).
+        y: column plotted on the y axis (e.g. 'test_auc').
+        x: column for the x axis; if None, the row number.
+        hue: optional column or list of columns; one curve per value.
+        ax: Axes to draw on (e.g. from plt.subplots() for an interactive window);
+            if None a headless Figure with the Agg canvas is created.
+        columns: decimation bins per curve; defaults to the width of the axes in pixels.
+        title: axes title (defaults to the file name).
+        TEXT_COLOR, BACKGROUND_COLOR: colors of a figure created here, as in `plot_boxplots`.
+
+    Example:
+        fig, ax = plt.subplots(figsize=(12, 6))
+        live = LiveCurves(csv_path, 'test_auc', x='epoch', hue='lr', ax=ax)
+        live.follow(interval=5)
+    """
+
+    def __init__(self, path, y, x=None, hue=None, ax=None, columns=None, title=None,
+                 TEXT_COLOR='white', BACKGROUND_COLOR="#1F1F1F", figsize=(12, 6)):
+        self.path = Path(path)
+        self.y = y
+        self.x = x
+        self.hue = [] if hue is None else list(hue) if isinstance(hue, (list, tuple)) else [hue]
+        self.TEXT_COLOR = TEXT_COLOR
+        self.BACKGROUND_COLOR = BACKGROUND_COLOR
+
+        self._styled = ax is None
+        if ax is None:
+            with sns.axes_style("darkgrid", _style_dict(TEXT_COLOR, BACKGROUND_COLOR)):
+                fig = Figure(figsize=figsize)
+                FigureCanvasAgg(fig)
+                ax = fig.add_subplot()
+        self.ax = ax
+        self.fig = ax.figure
+        self.columns = columns or max(2, int(ax.bbox.width))
+        text_props = {'color': TEXT_COLOR} if self._styled else {}
+        ax.set_title(title or self.path.name, **text_props)
+        ax.set_xlabel(x or "row", **text_props)
+        ax.set_ylabel(y, **text_props)
+
+        # Blitting only pays off on a canvas that is shown (pyplot figures have a manager)
+        canvas = self.fig.canvas
+        self._live = canvas.manager is not None and getattr(canvas, 'supports_blit', False)
+        self._note = ax.text(0.995, 0.01, "", transform=ax.transAxes, ha='right', va='bottom', fontsize=8,
+                             alpha=0.8, animated=self._live, **text_props)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        for line in getattr(self, '_lines', {}).values():
+            line.remove()
+        self._curves = {}      # label -> _MinMaxDecimator
+        self._lines = {}       # label -> Line2D
+        self._names = None     # CSV header
+        self._offset = 0       # bytes consumed, always at a line boundary
+        self._rows = 0
+        self._bounds = None    # (xmin, xmax, ymin, ymax) of all data
+        self._background = None
+
+    def _read_new_rows(self):
+        """Fold complete rows appended since the last call into the decimators; returns (rows, changed labels)."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0, set()
+        if size < self._offset:
+            # Truncated or rewritten: start over
+            self._reset()
+        if self._names is None:
+            with open(self.path, 'rb') as f:
+                header = f.readline()
+            if not header.endswith(b'\n'):
+                return 0, set()  # header not fully written yet
+            self._names = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+            self._offset = len(header)
+
+        columns = list(dict.fromkeys([c for c in (self.x, self.y) if c] + self.hue))
+        rows, changed = 0, set()
+        for chunk, offset in _read_csv_from_offset(self.path, self._offset, self._names, columns):
+            self._offset = offset
+            y = pd.to_numeric(chunk[self.y], errors='coerce').to_numpy(dtype=float)
+            if self.x is None:
+                x = np.arange(self._rows, self._rows + len(chunk), dtype=float)
             else:
-                ax = sns.boxplot(
-                    data=all_data,
-                    x='DataFrame',
-                    y=value_column,
-                    hue=separation,
-                    palette='Set2',
-                    order=labels,
-                    **plot_props # Unpack all the white-line props
-                )
+                x = pd.to_numeric(chunk[self.x], errors='coerce').to_numpy(dtype=float)
+            self._rows += len(chunk)
+            rows += len(chunk)
 
-                # --- 3. Plotting the Trace Line (if requested) ---
-                if trace_line:
-                    x = np.arange(len(labels))
-                    
-                    hue_levels = sorted(all_data[separation].unique())
-                    palette = sns.color_palette("Set2", n_colors=len(hue_levels))
-                    color_map = dict(zip(hue_levels, palette))
-
-                    for i, sep_val in enumerate(hue_levels):
-                        medians_for_hue = medians_df[medians_df[separation] == sep_val]
-                        
-                        ordered_medians = pd.DataFrame({'DataFrame': labels})
-                        ordered_medians = ordered_medians.merge(
-                            medians_for_hue, 
-                            on='DataFrame', 
-                            how='left'
-                        )
-                        y = ordered_medians['Median'].values 
-
-                        ax.plot(
-                            x, y, 
-                            marker='.',        
-                            linestyle='--',    
-                            color=color_map[sep_val], 
-                            zorder=10,         
-                            alpha=0.9
-                        )
-
-            # --- 4. Plot Finalization and Styling (All Text White) ---
-            
-            ax.set_title(title, color=TEXT_COLOR, fontsize=16, pad=20)
+            if self.hue:
+                groups, labels = split_df(chunk, self.hue, as_indices=True)
+            else:
+                groups, labels = [np.arange(len(chunk))], [self.y]
+            for positions, label in zip(groups, labels):
+                gx, gy = x[positions], y[positions]
+                finite = np.isfinite(gx) & np.isfinite(gy)
+                if not finite.any():
+                    continue
+                gx, gy = gx[finite], gy[finite]
+                if label not in self._curves:
+                    self._curves[label] = _MinMaxDecimator(self.columns)
+                self._curves[label].update(gx, gy)
+                changed.add(label)
 
-            x_label = X_axis if X_axis is not None else 'DataFrame'
-            y_label = Y_axis if Y_axis is not None else value_column
-            ax.set_xlabel(x_label, color=TEXT_COLOR, fontsize=12, labelpad=15)
-            ax.set_ylabel(y_label, color=TEXT_COLOR, fontsize=12, labelpad=15)
+                bounds = (gx.min(), gx.max(), gy.min(), gy.max())
+                if self._bounds is None:
+                    self._bounds = bounds
+                else:
+                    self._bounds = (min(self._bounds[0], bounds[0]), max(self._bounds[1], bounds[1]),
+                                    min(self._bounds[2], bounds[2]), max(self._bounds[3], bounds[3]))
+        return rows, changed
 
-            ax.tick_params(axis='x', colors=TEXT_COLOR, labelsize=10)
-            ax.tick_params(axis='y', colors=TEXT_COLOR, labelsize=10)
-            
-            for spine in ax.spines.values():
-                spine.set_edgecolor(TEXT_COLOR)
-
-            for h_val in horizontals:
-                ax.axhline(y=h_val, color=TEXT_COLOR, linestyle=':', linewidth=1, alpha=0.8)
-
-            if separation is not None:
-                legend = ax.get_legend()
-                if legend:
-                    title_obj = legend.get_title()
-                    if title_obj:
-                        title_obj.set_color(TEXT_COLOR)
-                    
-                    for text in legend.get_texts():
-                        text.set_color(TEXT_COLOR)
-                    
-                    frame = legend.get_frame()
-                    frame.set_facecolor(BACKGROUND_COLOR) 
-                    frame.set_edgecolor(TEXT_COLOR)
+    def _fit_limits(self):
+        """Widen the view if the data left it (with headroom so this is rare); True if it changed."""
+        xmin, xmax, ymin, ymax = self._bounds
+        (x_lo, x_hi), (y_lo, y_hi) = self.ax.get_xlim(), self.ax.get_ylim()
+        changed = False
+        if not self.ax.lines or xmin < x_lo or xmax > x_hi:
+            extent = (xmax - xmin) or max(abs(xmax), 1.0)
+            self.ax.set_xlim(xmin, xmax + 0.25 * extent)
+            changed = True
+        if not self.ax.lines or ymin < y_lo or ymax > y_hi:
+            pad = 0.05 * max(ymax - ymin, abs(ymax) * 1e-3, 1e-9)
+            self.ax.set_ylim(ymin - pad, ymax + pad)
+            changed = True
+        return changed
 
-        # --- 5. Show the Plot ---
-        plt.tight_layout() 
-        plt.show()
+    def _style_legend(self):
+        legend = self.ax.legend(title=", ".join(self.hue) if self.hue else None)
+        if self._styled:
+            legend.get_frame().set_facecolor(self.BACKGROUND_COLOR)
+            legend.get_frame().set_edgecolor(self.TEXT_COLOR)
+            for text in legend.get_texts() + [legend.get_title()]:
+                text.set_color(self.TEXT_COLOR)
+
+    def _update_artists(self, changed):
+        """Update the changed curves; returns True if the whole figure must be redrawn."""
+        full = self._fit_limits()
+        for label in changed:
+            line = self._lines.get(label)
+            if line is None:
+                color = sns.color_palette("Set2")[len(self._lines) % 8]
+                line, = self.ax.plot([], [], label=str(label), color=color, linewidth=1, animated=self._live)
+                self._lines[label] = line
+                full = True
+            line.set_data(*self._curves[label].points())
+        if full and (self.hue or len(self._lines) > 1):
+            self._style_legend()
+        drawn = sum(len(line.get_xdata()) for line in self._lines.values())
+        self._note.set_text(f"{self._rows:,} rows, {drawn:,} points drawn")
+        return full
+
+    def _blit(self, full):
+        canvas = self.fig.canvas
+        if full or self._background is None:
+            # Animated artists are left out of draw(): the background is everything else
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self.ax.bbox)
+        else:
+            canvas.restore_region(self._background)
+        for line in self._lines.values():
+            self.ax.draw_artist(line)
+        self.ax.draw_artist(self._note)
+        canvas.blit(self.ax.bbox)
+        canvas.flush_events()
+
+    @profiled()
+    def poll(self):
+        """Read rows appended since the last call and update the plot; returns the number of new rows."""
+        with self._lock:
+            rows, changed = self._read_new_rows()
+            if not changed:
+                return rows
+            full = self._update_artists(changed)
+            if self._live:
+                self._blit(full)
+            return rows
+
+    @profiled()
+    def render_png(self, output=None, dpi=100):
+        """
+        Render the current state as PNG, without a display (e.g. for the bot).
+
+        Args:
+            output: file path or binary file-like object; if None the PNG bytes are returned.
+            dpi: resolution.
+
+        Returns:
+            PNG bytes if `output` is None, else None.
+        """
+        with self._lock:
+            artists = list(self._lines.values()) + [self._note]
+            for artist in artists:
+                artist.set_animated(False)  # savefig skips animated artists
+            try:
+                buffer = io.BytesIO() if output is None else output
+                self.fig.savefig(buffer, format='png', dpi=dpi, facecolor=self.fig.get_facecolor())
+            finally:
+                for artist in artists:
+                    artist.set_animated(self._live)
+                self._background = None  # savefig may have resized the canvas
+        return buffer.getvalue() if output is None else None
+
+    def follow(self, interval=2.0, timeout=None):
+        """Poll every `interval` seconds, keeping an interactive window responsive (blocks).
+
+        Args:
+            interval: seconds between polls.
+            timeout: stop after this many seconds (None: until interrupted).
+        """
+        start = time.monotonic()
+        while timeout is None or time.monotonic() - start < timeout:
+            self.poll()
+            if self._live:
+                self.fig.canvas.start_event_loop(interval)
+            else:
+                time.sleep(interval)
@@ -0,0 +1,220 @@
+import asyncio
+import os
+import shlex
+import time
+from pathlib import Path
+from .profiling import span
+
+PAGE_SIZE = 3900  # Telegram allows 4096 characters; leaves room for the page marker
+
+def paginate(text, limit=PAGE_SIZE, header="", code=False):
+    """Splits `text` into messages of at most `limit` characters, on line boundaries.
+
+    Args:
+        text: body to send.
+        limit: maximum characters per page (header and fences included).
+        header: prepended to the first page only.
+        code: wrap every page in a ``` block, so Markdown stays balanced across pages.
+
+    Returns:
+        list of page strings; pages get a '(i/n)' marker when there is more than one.
+    """
+    overhead = len(header) + (8 if code else 0) + 16
+    width = max(1, limit - overhead)
+
+    chunks, current = [], ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > width:  # a single huge line is hard-split
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:width])
+            line = line[width:]
+        if len(current) + len(line) > width:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current or not chunks:
+        chunks.append(current)
+
+    pages = []
+    for i, chunk in enumerate(chunks):
+        body = chunk.rstrip("\n")
+        page = f"```\n{body}\n```" if code else body
+        if len(chunks) > 1:
+            page += f"\n({i + 1}/{len(chunks)})"
+        pages.append((header if i == 0 else "") + page)
+    return pages
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `burst`."""
+
+    def __init__(self, rate=1.0, burst=5):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Drains the bucket for `seconds` (server-side flood control asked us to wait)."""
+        self._tokens = -seconds * self.rate
+        self._updated = time.monotonic()
+
+class AlertSpool:
+    """Directory of pending crash alerts, written by finished jobs and drained by the bot.
+
+    A job reports a failure by atomically renaming a one-line file
+    ('<name> <exit code>') into the spool, with plain shell (see `shell_hook`), so
+    a sweep that crashes many runs at once costs no interpreter starts.
+    """
+
+    def __init__(self, spool_dir):
+        self.spool_dir = Path(spool_dir)
+
+    def shell_hook(self, name):
+        """Bash snippet that records `name` and the last exit code ($?) in the spool.
+
+        The snippet ends with `exit $code`, so the enclosing (sub)shell still
+        reports the failure; run it inside `( ... )` if the shell must go on.
+        """
+        spool = shlex.quote(str(self.spool_dir))
+        tmp = f"{spool}/.{shlex.quote(name)}.$$.tmp"
+        return (f"{{ code=$?; mkdir -p {spool} && echo {shlex.quote(name)} $code > {tmp} && "
+                f"mv {tmp} {spool}/{shlex.quote(name)}.$$.alert; exit $code; }}")
+
+    def write(self, name, exit_code=None):
+        """Python counterpart of `shell_hook`."""
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.spool_dir / f".{name}.{os.getpid()}.tmp"
+        tmp_path.write_text(f"{name} {'' if exit_code is None else exit_code}\n")
+        os.replace(tmp_path, self.spool_dir / f"{name}.{os.getpid()}.alert")
+
+    def drain(self):
+        """Removes and returns the pending alerts as (name, exit code or None), oldest first."""
+        try:
+            paths = sorted(self.spool_dir.glob("*.alert"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return []
+        alerts = []
+        for path in paths:
+            try:
+                fields = path.read_text().split()
+                path.unlink()
+            except OSError:
+                continue  # drained concurrently or half-deleted
+            if fields:
+                code = int(fields[1]) if len(fields) > 1 and fields[1].lstrip("-").isdigit() else None
+                alerts.append((fields[0], code))
+        return alerts
+
+class Outbox:
+    """Single outbound queue for every message the bot sends.
+
+    Messages are delivered in order by one worker, throttled by a token bucket
+    and retried when Telegram answers with flood control (RetryAfter). Long texts
+    are paginated instead of truncated. Alerts are coalesced: everything raised
+    within `coalesce_window` seconds goes out as one message, with repeated
+    alerts for the same key counted rather than repeated.
+
+    Args:
+        rate: messages per second.
+        burst: messages that may be sent back to back.
+        coalesce_window: seconds alerts are held for coalescing.
+        max_retries: delivery attempts per message on flood control.
+    """
+
+    def __init__(self, rate=1.0, burst=5, coalesce_window=10.0, max_retries=3):
+        self.bucket = TokenBucket(rate, burst)
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self._queue = None
+        self._bot = None
+        self._alerts = {}   # (chat_id, key) -> [text, count]
+        self._flush_task = None
+
+    def start(self, bot):
+        """Binds the bot and starts the delivery worker (call from the running loop)."""
+        self._bot = bot
+        self._queue = asyncio.Queue()
+        return asyncio.get_running_loop().create_task(self._worker())
+
+    async def call(self, method, *args, **kwargs):
+        """Throttled direct API call (edits, pins, photos), retried on flood control."""
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                with span(f"telegram: {getattr(method, '__name__', 'call')}", attempt=attempt):
+                    return await method(*args, **kwargs)
+            except Exception as e:
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after is None or attempt == self.max_retries:
+                    raise
+                if hasattr(retry_after, "total_seconds"):  # timedelta in newer python-telegram-bot
+                    retry_after = retry_after.total_seconds()
+                self.bucket.pause(retry_after)
+
+    async def send(self, chat_id, text, header="", code=False, **kwargs):
+        """Queues `text` (paginated) and waits until it is delivered.
+
+        Returns:
+            the Message of the first page.
+        """
+        future = asyncio.get_running_loop().create_future()
+        with span("send", chars=len(text)):
+            await self._queue.put((chat_id, paginate(text, header=header, code=code), kwargs, future))
+            return await future
+
+    async def reply(self, message, text, **kwargs):
+        """`send` to the chat of `message` (drop-in for message.reply_text)."""
+        return await self.send(message.chat_id, text, **kwargs)
+
+    def alert(self, chat_id, key, text):
+        """Queues an alert; alerts within the coalescing window are merged into one message."""
+        entry = self._alerts.setdefault((chat_id, key), [text, 0])
+        entry[1] += 1
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_alerts())
+
+    async def _flush_alerts(self):
+        await asyncio.sleep(self.coalesce_window)
+        alerts, self._alerts = self._alerts, {}
+
+        by_chat = {}
+        for (chat_id, _), (text, count) in alerts.items():
+            by_chat.setdefault(chat_id, []).append(text + (f" (×{count})" if count > 1 else ""))
+        for chat_id, texts in by_chat.items():
+            body = texts[0] if len(texts) == 1 else f"🚨 {len(texts)} alerts\n" + "\n".join(f"• {t}" for t in texts)
+            try:
+                await self.send(chat_id, body, parse_mode="Markdown")
+            except Exception as e:
+                print(f"Could not deliver alerts: {e}")
+
+    async def _worker(self):
+        while True:
+            chat_id, pages, kwargs, future = await self._queue.get()
+            try:
+                first = None
+                for i, page in enumerate(pages):
+                    # Keyboards and the like belong to the last page
+                    page_kwargs = kwargs if i == len(pages) - 1 else {k: v for k, v in kwargs.items() if k == "parse_mode"}
+                    message = await self.call(self._bot.send_message, chat_id=chat_id, text=page, **page_kwargs)
+                    first = first or message
+                if not future.done():
+                    future.set_result(first)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,208 @@
+"""Opt-in timing spans for benri and the bot.
+
+Spans nest (per thread and per asyncio task) and record wall time and,
+optionally, the net bytes allocated according to tracemalloc. Disabled by
+default: `span()` then returns a shared no-op object and `@profiled` functions
+call straight through, so instrumented code costs one global check.
+
+    from benri import profiling
+    profiling.enable(memory=True)
+    aggregate_and_save_top_configs(...)
+    print(profiling.summary())
+    profiling.export_chrome_trace("trace.json")   # chrome://tracing or ui.perfetto.dev
+
+Setting BENRI_PROFILE=1 (or BENRI_PROFILE=memory) enables it at import time.
+"""
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+_ENABLED = False
+_MEMORY = False
+_STARTED_TRACEMALLOC = False
+_EVENTS = deque(maxlen=100_000)
+_IDS = itertools.count(1)
+_PARENT = contextvars.ContextVar("benri_profiling_parent", default=0)
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("name", "args", "id", "parent", "start", "memory", "_token")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.id = next(_IDS)
+        self.parent = _PARENT.get()
+        self._token = _PARENT.set(self.id)
+        self.memory = tracemalloc.get_traced_memory()[0] if _MEMORY and tracemalloc.is_tracing() else None
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        allocated = None
+        if self.memory is not None and tracemalloc.is_tracing():
+            allocated = tracemalloc.get_traced_memory()[0] - self.memory
+        _PARENT.reset(self._token)
+        _EVENTS.append({
+            'name': self.name, 'id': self.id, 'parent': self.parent, 'start_ns': self.start,
+            'duration_ns': end - self.start, 'pid': os.getpid(), 'tid': threading.get_ident(),
+            'allocated': allocated, 'args': self.args, 'error': exc_type.__name__ if exc_type else None,
+        })
+        return False
+
+def enable(memory=False, max_events=100_000):
+    """Start recording spans; `memory` also records net allocated bytes (tracemalloc, slower)."""
+    global _ENABLED, _MEMORY, _STARTED_TRACEMALLOC, _EVENTS
+    if max_events != _EVENTS.maxlen:
+        _EVENTS = deque(_EVENTS, maxlen=max_events)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _STARTED_TRACEMALLOC = True
+    _MEMORY = memory
+    _ENABLED = True
+
+def disable():
+    """Stop recording; recorded spans are kept until `reset()`."""
+    global _ENABLED, _MEMORY, _STARTED_TRACEMALLOC
+    _ENABLED = False
+    _MEMORY = False
+    if _STARTED_TRACEMALLOC:
+        tracemalloc.stop()
+        _STARTED_TRACEMALLOC = False
+
+def is_enabled():
+    return _ENABLED
+
+def reset():
+    """Drop all recorded spans."""
+    _EVENTS.clear()
+
+def span(name, **args):
+    """Context manager timing the enclosed block as `name` (extra keyword args are kept as metadata)."""
+    if not _ENABLED:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+def profiled(name=None):
+    """Decorator: records every call of the function as a span (named after it by default)."""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return func(*args, **kwargs)
+            with _Span(label, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def events():
+    """Recorded spans (dicts), in order of completion."""
+    return list(_EVENTS)
+
+def collect(func, *args, **kwargs):
+    """Run `func` with recording on and return (result, its spans); meant for worker processes.
+
+    The worker's own recording is reset first. Pass the spans to `merge` in the
+    parent so they show up in its summary and trace. Allocations are not tracked.
+    """
+    reset()
+    enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        disable()
+    return result, events()
+
+def merge(spans):
+    """Add spans recorded elsewhere (see `collect`); their roots become children of the current span."""
+    parent = _PARENT.get()
+    ids = {0: parent}
+    for event in spans:
+        ids[event['id']] = next(_IDS)
+    for event in spans:
+        _EVENTS.append(dict(event, id=ids[event['id']], parent=ids.get(event['parent'], parent)))
+
+def export_chrome_trace(path=None):
+    """
+    Recorded spans in Chrome trace-event format (complete 'X' events).
+
+    Args:
+        path: optional file to write the JSON to.
+    Returns:
+        dict with 'traceEvents', loadable in chrome://tracing or Perfetto.
+    """
+    trace_events = []
+    for event in _EVENTS:
+        args = {key: str(value) for key, value in event['args'].items()}
+        if event['allocated'] is not None:
+            args['allocated_bytes'] = event['allocated']
+        if event['error']:
+            args['error'] = event['error']
+        trace_events.append({
+            'name': event['name'], 'cat': 'benri', 'ph': 'X',
+            'ts': event['start_ns'] / 1000, 'dur': event['duration_ns'] / 1000,
+            'pid': event['pid'], 'tid': event['tid'], 'args': args,
+        })
+    trace = {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+    if path is not None:
+        with open(path, "w") as f:
+            json.dump(trace, f)
+    return trace
+
+def summary(top=20):
+    """Text table per span name: calls, total, self time (minus child spans), mean and max."""
+    recorded = list(_EVENTS)
+    if not recorded:
+        return "No spans recorded." + ("" if _ENABLED else " Profiling is disabled.")
+
+    child_time = {}
+    for event in recorded:
+        if event['parent']:
+            child_time[event['parent']] = child_time.get(event['parent'], 0) + event['duration_ns']
+
+    stats = {}
+    for event in recorded:
+        entry = stats.setdefault(event['name'], [0, 0, 0, 0, None])
+        entry[0] += 1
+        entry[1] += event['duration_ns']
+        entry[2] += event['duration_ns'] - child_time.get(event['id'], 0)
+        entry[3] = max(entry[3], event['duration_ns'])
+        if event['allocated'] is not None:
+            entry[4] = (entry[4] or 0) + event['allocated']
+
+    show_memory = any(entry[4] is not None for entry in stats.values())
+    rows = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    width = min(40, max(len(name) for name, _ in rows))
+    header = f"{'span':<{width}} {'calls':>6} {'total ms':>10} {'self ms':>10} {'mean ms':>9} {'max ms':>9}"
+    lines = [header + (f" {'alloc MiB':>10}" if show_memory else "")]
+    for name, (calls, total, own, longest, allocated) in rows:
+        line = (f"{name[:width]:<{width}} {calls:>6} {total / 1e6:>10.1f} {own / 1e6:>10.1f} "
+                f"{total / calls / 1e6:>9.2f} {longest / 1e6:>9.1f}")
+        if show_memory:
+            line += f" {allocated / 2**20:>10.2f}" if allocated is not None else f" {'':>10}"
+        lines.append(line)
+    return "\n".join(lines)
+
+if os.environ.get("BENRI_PROFILE"):
+    enable(memory=os.environ["BENRI_PROFILE"].lower() in ("memory", "mem"))
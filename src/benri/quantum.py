@@ -1,67 +1,369 @@
-import torch
+import functools
+import numbers
+import numpy as np
 
-class FalseQubitSystem(torch.tensor):
+try:
+    import torch
+except ImportError:  # NumPy fallback
+    torch = None
+
+_AXES = ('X', 'Y', 'Z')
+
+def _resolve_backend(backend, states=None):
+    if backend is None:
+        if torch is not None and isinstance(states, torch.Tensor):
+            return 'torch'
+        if isinstance(states, np.ndarray):
+            return 'numpy'
+        return 'torch' if torch is not None else 'numpy'
+    if backend not in ('torch', 'numpy'):
+        raise ValueError(f"backend must be 'torch' or 'numpy', got {backend!r}.")
+    if backend == 'torch' and torch is None:
+        raise ImportError("The torch backend needs PyTorch. Install it or use backend='numpy'.")
+    return backend
+
+def _single_axis(axis):
+    """True for 'X'/'Y'/'Z' (and invalid strings), False for one axis per qubit ('XYZ', ['X', 'Y'])."""
+    return isinstance(axis, str) and (len(axis) == 1 or any(a not in _AXES for a in axis))
+
+class FalseQubitSystem:
     """
-    A simple False Qubit class extending torch.tensor to represent a "qubit state" from its pseudo-coordinates on the Bloch sphere:
+    A batch of "false qubit" registers stored as their pseudo-coordinates on the Bloch sphere.
+
+    The state is one array of shape (N_batch, N_qubits, 2) holding the (height, depth)
+    coordinates of every qubit of every register, so rotations and measurements run as
+    single vectorized operations over the whole batch. Runs on torch when available
+    (on the device of the given tensor, CPU by default), otherwise on NumPy.
+
     Attributes:
-        state (torch.tensor): A tensor of shape (2,) representing the (height, depth) coordinates on the Bloch sphere.
-        height (float): The latitude (-1 to 1) -> defaults to -1 (|0> state).
-        depth (float): The longitude (-1 to 1) -> defaults to -1 (Greenwich).
+        state: array of shape (N_batch, N_qubits, 2).
+        height: view (N_batch, N_qubits) of the latitudes (-1 to 1) -> defaults to -1 (|0> state).
+        depth: view (N_batch, N_qubits) of the longitudes (-1 to 1) -> defaults to -1 (Greenwich).
+
+    Args:
+        states: initial coordinates of shape (2,), (N_qubits, 2) or (N_batch, N_qubits, 2);
+            if None, every qubit starts in |0>, i.e. (-1, -1).
+        n_qubits: qubits per register when `states` is None.
+        batch_size: registers in the batch when `states` is None (or to broadcast a single register).
+        backend: 'torch' or 'numpy'; defaults to the type of `states`, else torch if installed.
+        dtype: 'float32' or 'float64'.
     """
-    def __init__(self, states=torch.tensor([-1.0, -1.0])): # Default state |0> represented as (-1,0)
-        assert states.shape[-1] == 2, "State must be a tensor of shape (..., 2) representing (height, depth) coordinates."
-        super().__init__(states)
+    def __init__(self, states=None, n_qubits=1, batch_size=None, backend=None, dtype='float32'):
+        self.backend = _resolve_backend(backend, states)
+        self._xp = torch if self.backend == 'torch' else np
+        self.dtype = getattr(self._xp, dtype)
+        self._dtype_name = dtype
+        self._device = states.device if self.backend == 'torch' and isinstance(states, torch.Tensor) else None
+
+        if states is None:
+            states = self._xp.full((batch_size or 1, n_qubits, 2), -1.0, dtype=self.dtype)
+        else:
+            states = self._as_array(states, copy=True)  # rotations are in place; never alias the caller's array
+            assert states.shape[-1] == 2, "State must be a tensor of shape (..., 2) representing (height, depth) coordinates."
+            states = states.reshape((1,) * (3 - states.ndim) + tuple(states.shape)) if states.ndim < 3 else states
+            if states.ndim != 3:
+                raise ValueError(f"states must have at most 3 dimensions, got shape {tuple(states.shape)}.")
+            if batch_size is not None and states.shape[0] != batch_size:
+                states = self._broadcast(states, (batch_size,) + tuple(states.shape[1:]))
+        self.state = states
+
+    # --- Array helpers ---
+
+    def _as_array(self, values, copy=False):
+        if self.backend == 'torch':
+            values = torch.as_tensor(values, dtype=self.dtype, device=self._device)
+            return values.clone() if copy else values
+        return np.array(values, dtype=self.dtype, copy=True) if copy else np.asarray(values, dtype=self.dtype)
+
+    def _as_native(self, values):
+        """NumPy index or mask array as this backend's array type (dtype kept)."""
+        return torch.as_tensor(values, device=self._device) if self.backend == 'torch' else values
+
+    def _broadcast(self, values, shape):
+        if self.backend == 'torch':
+            return values.expand(shape).clone()
+        return np.broadcast_to(values, shape).copy()
+
+    # --- Properties ---
+
+    @property
+    def batch_size(self):
+        return self.state.shape[0]
+
+    @property
+    def n_qubits(self):
+        return self.state.shape[1]
+
+    @property
+    def height(self):
+        """View of the heights, shape (N_batch, N_qubits)."""
+        return self.state[..., 0]
+
+    @property
+    def depth(self):
+        """View of the depths, shape (N_batch, N_qubits)."""
+        return self.state[..., 1]
 
     def get_coordinates(self):
         """
-        Returns the (height, depth) coordinates of the qubit state of given qubit.
+        Returns the (height, depth) coordinates of every qubit.
         Returns:
-            tuple: A tuple containing (height, depth).
+            tuple: (height, depth), each of shape (N_batch, N_qubits).
         """
-        height, depth = self[...,0].item(), self[...,1].item()
-        return height, depth
-    
-    def measure(self):
+        return self.height, self.depth
+
+    def copy(self):
+        return FalseQubitSystem(self.state.clone() if self.backend == 'torch' else self.state.copy(),
+                                backend=self.backend, dtype=self._dtype_name)
+
+    def numpy(self):
+        """The state as a NumPy array of shape (N_batch, N_qubits, 2)."""
+        return self.state.detach().cpu().numpy() if self.backend == 'torch' else self.state
+
+    def __repr__(self):
+        return f"FalseQubitSystem(batch_size={self.batch_size}, n_qubits={self.n_qubits}, backend={self.backend!r})"
+
+    # --- Gates ---
+
+    def _factors(self, axis, angles):
+        """(height factor, depth factor) of a rotation; None stands for an untouched coordinate."""
+        xp = self._xp
+        angles = self._as_array(angles)
+        if _single_axis(axis):
+            if axis == 'X':
+                return xp.sin(angles), xp.cos(angles)
+            if axis == 'Y':
+                return xp.cos(angles), None
+            if axis == 'Z':
+                return None, xp.cos(angles)
+            raise ValueError("Axis must be 'X', 'Y', or 'Z'.")
+
+        # One axis per selected qubit: pick the factors with masks instead of looping
+        if any(a not in _AXES for a in axis):
+            raise ValueError("Axis must be 'X', 'Y', or 'Z'.")
+        codes = np.array([_AXES.index(a) for a in axis])
+        is_x, is_y = self._as_native(codes == 0), self._as_native(codes == 1)
+        sin, cos = xp.sin(angles), xp.cos(angles)
+        one = xp.ones_like(cos)
+        height_factor = xp.where(is_x, sin, xp.where(is_y, cos, one))
+        depth_factor = xp.where(is_y, one, cos)
+        return height_factor, depth_factor
+
+    def rotate(self, axis, angles, qubits=None, inplace=True):
         """
-        Simulates a measurement of the qubit state.
+        Rotates a whole layer of qubits in one operation.
+
+        Args:
+            axis: 'X', 'Y' or 'Z', or one axis per selected qubit (e.g. 'XYZX' or ['X', 'Y']).
+            angles: rotation angles in radians, broadcastable to (N_batch, n_selected):
+                a scalar, one angle per selected qubit, or one per register and qubit.
+                With a single int qubit, a 1-D array holds one angle per register.
+            qubits: int, list of ints or slice of qubits to rotate (default: all).
+            inplace: update this system (default) or return a rotated copy.
         Returns:
-            int: 0 or 1 based on the qubit state probabilities.
+            FalseQubitSystem: this system if `inplace`, else the rotated copy.
         """
-        coordinates = self.get_coordinates()
-        normalized = torch.nn.functional.normalize(coordinates, p = 2, dim = -1)
+        target = self if inplace else self.copy()
+        if isinstance(qubits, numbers.Integral):
+            index = [qubits]
+            angles = target._as_array(angles)
+            if angles.ndim == 1:
+                angles = angles.reshape(-1, 1)  # one angle per register
+        else:
+            index = slice(None) if qubits is None else qubits
+        n_selected = len(range(target.n_qubits)[index]) if isinstance(index, slice) else len(index)
+        if not _single_axis(axis) and len(axis) != n_selected:
+            raise ValueError(f"Got {len(axis)} axes for {n_selected} qubits.")
+
+        height_factor, depth_factor = target._factors(axis, angles)
+        if height_factor is not None:
+            target.state[:, index, 0] *= height_factor
+        if depth_factor is not None:
+            target.state[:, index, 1] *= depth_factor
+        return target
+
+    # --- Measurement ---
 
-        prob_0 = (1 + normalized[..., 0]) / 2  # Probability of measuring |0>
-        sampled = torch.rand_like(prob_0)
+    def probabilities(self):
+        """Probability of measuring |0> for every qubit, shape (N_batch, N_qubits)."""
+        xp = self._xp
+        height, depth = self.height, self.depth
+        norm = xp.sqrt(height * height + depth * depth)
+        # A zero vector carries no information: measure it 50/50
+        safe = xp.where(norm > 0, norm, xp.ones_like(norm))
+        normalized = xp.where(norm > 0, height / safe, xp.zeros_like(height))
+        return (1 + normalized) / 2
+
+    def measure(self, shots=None, seed=None):
+        """
+        Simulates measurements of every qubit of every register.
+        Args:
+            shots: number of independent shots; None for a single shot without the shots axis.
+            seed: optional seed for reproducible samples.
+        Returns:
+            bool array of shape (N_batch, N_qubits), or (shots, N_batch, N_qubits);
+            True means the qubit was measured as 1.
+        """
+        prob_0 = self.probabilities()
+        shape = tuple(prob_0.shape) if shots is None else (shots,) + tuple(prob_0.shape)
+        if self.backend == 'torch':
+            generator = torch.Generator(device=prob_0.device).manual_seed(seed) if seed is not None else None
+            sampled = torch.rand(shape, generator=generator, dtype=prob_0.dtype, device=prob_0.device)
+        else:
+            sampled = np.random.default_rng(seed).random(shape, dtype=prob_0.dtype)
         return sampled >= prob_0
-    
+
 def Rotation(system, qubit, axis, angle):
     """
-    Applies a rotation to the given qubit around the specified axis by the given angle.
+    Applies a rotation to the given qubit(s) of every register around the specified axis by the given angle.
     Args:
-        system
-        qubit (int): The qubit to be rotated.
+        system (FalseQubitSystem): the system to rotate (updated in place).
+        qubit (int or list): The qubit(s) to be rotated.
         axis (str): The axis of rotation ('X', 'Y', or 'Z').
-        angle (float): The angle of rotation in radians.
+        angle (float): The angle of rotation in radians (or one per qubit / register).
     Returns:
-        FalseQubit: The rotated qubit.
+        FalseQubitSystem: The rotated system.
+    """
+    return system.rotate(axis, angle, qubits=qubit)
+
+class CircuitPlan:
+    """
+    Compiled form of a `Circuit`: the whole circuit as one (height, depth) factor pair per qubit.
+
+    Every rotation scales the coordinates of one qubit (X: sin/cos, Y: cos/1, Z: 1/cos),
+    so gates commute and all the gates of a qubit fuse into a single product. Factors
+    of fixed angles are precomputed at compile time; parametric gates are evaluated
+    at run time with one sin/cos per parameter and a padded per-qubit product.
+    Build plans with `Circuit.compile()`, which caches them by circuit structure.
+
+    Args:
+        n_qubits: qubits the circuit acts on.
+        gates: tuple of (qubit, axis, angle) where angle is a float or a parameter name.
     """
-    vheight, vdepth = system.get_coordinates()
-    height, depth = vheight[...,qubit], vdepth[...,qubit]
-    
-    if axis == 'X':
-        new_height =   height * torch.sin(angle)
-        new_depth   =   depth   * torch.cos(angle)
-    elif axis == 'Y':
-        new_height =   height * torch.cos(angle)
-        new_depth   =   depth
-    elif axis == 'Z':
-        new_height =   height
-        new_depth   =   depth   * torch.cos(angle) 
-    else:
-        raise ValueError("Axis must be 'X', 'Y', or 'Z'.")
-    
-    vheight[...,qubit], vdepth[...,qubit] = new_height, new_depth
-    
-    return FalseQubitSystem(torch.tensor([new_height, new_depth]))
-
-    
\ No newline at end of file
+    def __init__(self, n_qubits, gates):
+        self.n_qubits = n_qubits
+        self.parameters = tuple(dict.fromkeys(angle for _, _, angle in gates if isinstance(angle, str)))
+
+        # Fixed gates: multiply into constant factors once
+        self.fixed = np.ones((n_qubits, 2))
+        parametric = []
+        for qubit, axis, angle in gates:
+            if isinstance(angle, str):
+                parametric.append((qubit, _AXES.index(axis), self.parameters.index(angle)))
+            elif axis == 'X':
+                self.fixed[qubit] *= (np.sin(angle), np.cos(angle))
+            elif axis == 'Y':
+                self.fixed[qubit, 0] *= np.cos(angle)
+            else:
+                self.fixed[qubit, 1] *= np.cos(angle)
+
+        # Parametric gates: the terms of qubit q are gathered through a padded index
+        # (Q, max gates per qubit); padding points at an extra term equal to 1
+        parametric = np.array(parametric, dtype=np.int64).reshape(-1, 3)
+        self._gate_axis = parametric[:, 1]
+        self._gate_param = parametric[:, 2]
+        per_qubit = [np.flatnonzero(parametric[:, 0] == q) for q in range(n_qubits)]
+        width = max((len(g) for g in per_qubit), default=0)
+        self._gather = np.full((n_qubits, width), len(parametric), dtype=np.int64)
+        for q, gate_positions in enumerate(per_qubit):
+            self._gather[q, :len(gate_positions)] = gate_positions
+
+    def factors(self, system, params=None):
+        """(height, depth) factors of shape (n_qubits, 2), or (N_batch, n_qubits, 2) for per-register parameters."""
+        fixed = system._as_array(self.fixed)
+        if not self.parameters:
+            return fixed
+
+        xp = system._xp
+        params = params if params is not None else {}
+        if not isinstance(params, dict):
+            params = dict(zip(self.parameters, params))
+        missing = [name for name in self.parameters if name not in params]
+        if missing:
+            raise ValueError(f"Missing circuit parameters: {missing}.")
+
+        values = [system._as_array(params[name]) for name in self.parameters]
+        if system.backend == 'torch':
+            angles = torch.stack(torch.broadcast_tensors(*values), dim=-1)
+        else:
+            angles = np.stack(np.broadcast_arrays(*values), axis=-1)
+        # One sin/cos per parameter (and per register), shared by all gates using it
+        sin, cos = xp.sin(angles), xp.cos(angles)
+        sin, cos = sin[..., system._as_native(self._gate_param)], cos[..., system._as_native(self._gate_param)]
+
+        is_x, is_y = system._as_native(self._gate_axis == 0), system._as_native(self._gate_axis == 1)
+        one = xp.ones_like(cos)
+        height_terms = xp.where(is_x, sin, xp.where(is_y, cos, one))
+        depth_terms = xp.where(is_y, one, cos)
+        terms = xp.stack([height_terms, depth_terms], -1)                       # (..., G, 2)
+        padding = xp.ones_like(terms[..., :1, :])
+        if system.backend == 'torch':
+            terms = torch.cat([terms, padding], dim=-2)
+        else:
+            terms = np.concatenate([terms, padding], axis=-2)
+        products = terms[..., system._as_native(self._gather), :].prod(-2)     # (..., Q, 2)
+        return fixed * products
+
+    def run(self, system, params=None, inplace=True):
+        """
+        Applies the circuit to every register of `system`.
+        Args:
+            system (FalseQubitSystem): batch of registers with `n_qubits` qubits.
+            params: values of the circuit parameters, as a dict or a sequence in
+                `parameters` order; each a scalar or one value per register.
+            inplace: update `system` (default) or return a rotated copy.
+        Returns:
+            FalseQubitSystem: the rotated system.
+        """
+        if system.n_qubits != self.n_qubits:
+            raise ValueError(f"Circuit acts on {self.n_qubits} qubits, system has {system.n_qubits}.")
+        target = system if inplace else system.copy()
+        target.state *= self.factors(target, params)
+        return target
+
+@functools.lru_cache(maxsize=128)
+def _compile(n_qubits, gates):
+    return CircuitPlan(n_qubits, gates)
+
+class Circuit:
+    """
+    Records rotations and compiles them into a cached `CircuitPlan`.
+
+    Angles are either fixed floats or parameter names whose values are given at run
+    time (scalars or one per register), so one compiled plan serves a whole sweep:
+
+        circuit = Circuit(3).rx(0, 0.3).ry(1, 'theta').rz(2, 1.2).rx(0, 'theta')
+        circuit.run(FalseQubitSystem(n_qubits=3, batch_size=1024), {'theta': thetas})
+
+    Args:
+        n_qubits: qubits the circuit acts on.
+    """
+    def __init__(self, n_qubits):
+        self.n_qubits = n_qubits
+        self.gates = []
+
+    def rotation(self, qubit, axis, angle):
+        """Appends a rotation; `angle` is a float or a parameter name. Returns the circuit."""
+        if axis not in _AXES:
+            raise ValueError("Axis must be 'X', 'Y', or 'Z'.")
+        if not 0 <= qubit < self.n_qubits:
+            raise ValueError(f"Qubit {qubit} out of range for {self.n_qubits} qubits.")
+        self.gates.append((int(qubit), axis, angle if isinstance(angle, str) else float(angle)))
+        return self
+
+    def rx(self, qubit, angle):
+        return self.rotation(qubit, 'X', angle)
+
+    def ry(self, qubit, angle):
+        return self.rotation(qubit, 'Y', angle)
+
+    def rz(self, qubit, angle):
+        return self.rotation(qubit, 'Z', angle)
+
+    def compile(self):
+        """The compiled plan; identical circuits share one plan."""
+        return _compile(self.n_qubits, tuple(self.gates))
+
+    def run(self, system, params=None, inplace=True):
+        """Compiles (or reuses) the plan and applies it; see `CircuitPlan.run`."""
+        return self.compile().run(system, params, inplace)
@@ -0,0 +1,258 @@
+import json
+import os
+import shlex
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+def _read_meminfo_available():
+    """MemAvailable from /proc/meminfo in bytes, or None when unavailable."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobScheduler:
+    """Local queue that starts experiments when there is room for them.
+
+    Jobs wait in a queue persisted as JSON and are started in submission order
+    while fewer than `max_concurrent` are running and the machine has headroom:
+    1-minute load per CPU below `max_load` and at least `min_free_memory` bytes
+    available. A job can be pinned to a CPU list (e.g. '0-3,8'). Jobs run either in
+    a detached `screen` session or as a plain background process; both write a pid
+    and an exit-code file, so completion is detected even across restarts.
+    Only the `max_history` most recently finished (done, failed or cancelled) jobs
+    are kept in the queue file; older ones are dropped with their pid/exit files.
+
+    Args:
+        queue_dir: directory for the queue file and per-job pid/exit files.
+        max_concurrent: maximum number of jobs running at once.
+        max_load: maximum 1-minute load average per CPU to admit a job (None disables).
+        min_free_memory: minimum available memory in bytes to admit a job (None disables).
+        executor: 'screen' or 'subprocess'.
+        max_history: finished jobs kept for `describe()` and `jobs()`.
+    """
+
+    def __init__(self, queue_dir, max_concurrent=2, max_load=0.9, min_free_memory=2 * 2**30,
+                 executor="screen", max_history=50):
+        if executor not in ("screen", "subprocess"):
+            raise ValueError(f"executor must be 'screen' or 'subprocess', got {executor!r}.")
+        self.queue_dir = Path(queue_dir)
+        self.queue_path = self.queue_dir / "queue.json"
+        self.max_concurrent = max_concurrent
+        self.max_load = max_load
+        self.min_free_memory = min_free_memory
+        self.executor = executor
+        self.max_history = max_history
+        self._lock = threading.Lock()
+        self._jobs = self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        try:
+            with open(self.queue_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not read job queue {self.queue_path}: {e}")
+            return []
+
+    def _prune(self):
+        """Drops the oldest finished jobs beyond `max_history` (and their pid/exit files)."""
+        finished = [job for job in self._jobs if job['status'] in ('done', 'failed', 'cancelled')]
+        excess = len(finished) - self.max_history
+        if excess <= 0:
+            return
+        dropped = {id(job) for job in sorted(finished, key=lambda j: j['finished'] or 0)[:excess]}
+        for job in self._jobs:
+            if id(job) in dropped:
+                for suffix in ("pid", "exit"):
+                    self._job_file(job, suffix).unlink(missing_ok=True)
+        self._jobs = [job for job in self._jobs if id(job) not in dropped]
+
+    def _save(self):
+        self._prune()
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.queue_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._jobs, f, indent=2)
+        os.replace(tmp_path, self.queue_path)
+
+    def _job_file(self, job, suffix):
+        return self.queue_dir / "jobs" / f"{job['id']}.{suffix}"
+
+    # --- Queue operations ---
+
+    def submit(self, name, command, cwd, cpus=None):
+        """Queues a shell command; returns the job dict. It starts on the next `poll()`.
+
+        Args:
+            name: job name (also the screen session name).
+            command: shell command to run (bash -c).
+            cwd: working directory.
+            cpus: optional CPU list for taskset, e.g. '0-3'.
+        """
+        with self._lock:
+            job_id = max((job['id'] for job in self._jobs), default=0) + 1
+            job = {
+                'id': job_id, 'name': name, 'command': command, 'cwd': str(cwd), 'cpus': cpus,
+                'status': 'queued', 'submitted': time.time(), 'started': None, 'finished': None,
+                'pid': None, 'exit_code': None,
+            }
+            self._jobs.append(job)
+            self._save()
+            return dict(job)
+
+    def cancel(self, job_id):
+        """Removes a queued job. Running jobs are not touched; returns True if cancelled."""
+        with self._lock:
+            for job in self._jobs:
+                if job['id'] == job_id and job['status'] == 'queued':
+                    job['status'], job['finished'] = 'cancelled', time.time()
+                    self._save()
+                    return True
+        return False
+
+    def jobs(self, statuses=None):
+        with self._lock:
+            return [dict(job) for job in self._jobs if statuses is None or job['status'] in statuses]
+
+    def position(self, job_id):
+        """1-based position of a queued job, or None."""
+        queued = [job['id'] for job in self.jobs(('queued',))]
+        return queued.index(job_id) + 1 if job_id in queued else None
+
+    # --- Admission and execution ---
+
+    def has_headroom(self):
+        """(True, '') if the machine can take another job, else (False, reason)."""
+        if self.max_load is not None:
+            try:
+                load = os.getloadavg()[0] / (os.cpu_count() or 1)
+            except OSError:
+                load = 0.0
+            if load >= self.max_load:
+                return False, f"load {load:.2f}/CPU"
+        if self.min_free_memory is not None:
+            available = _read_meminfo_available()
+            if available is not None and available < self.min_free_memory:
+                return False, f"{available / 2**30:.1f} GiB free"
+        return True, ""
+
+    def _launch(self, job):
+        pid_file, exit_file = self._job_file(job, "pid"), self._job_file(job, "exit")
+        pid_file.parent.mkdir(parents=True, exist_ok=True)
+        for path in (pid_file, exit_file):
+            path.unlink(missing_ok=True)
+
+        pin = f"taskset -cp {shlex.quote(job['cpus'])} $$ > /dev/null && " if job['cpus'] else ""
+        script = (
+            f"echo $$ > {shlex.quote(str(pid_file))}; {pin}"
+            f"( {job['command']} ); echo $? > {shlex.quote(str(exit_file))}"
+        )
+
+        if self.executor == "screen":
+            subprocess.run(["screen", "-dmS", job['name'], "-h", "10000", "bash", "-c", script],
+                           cwd=job['cwd'], check=True)
+        else:
+            subprocess.Popen(["bash", "-c", script], cwd=job['cwd'], start_new_session=True,
+                             stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        job['status'], job['started'] = 'running', time.time()
+
+    def _update_running(self, job):
+        exit_file = self._job_file(job, "exit")
+        if job['pid'] is None:
+            try:
+                job['pid'] = int(self._job_file(job, "pid").read_text().strip())
+            except (OSError, ValueError):
+                pass
+
+        if exit_file.exists():
+            try:
+                job['exit_code'] = int(exit_file.read_text().strip())
+            except (OSError, ValueError):
+                job['exit_code'] = None
+            job['status'] = 'done' if job['exit_code'] == 0 else 'failed'
+        elif job['pid'] is not None and not _pid_alive(job['pid']):
+            job['status'] = 'failed'  # killed before it could record an exit code
+        else:
+            return
+        job['finished'] = time.time()
+
+    def poll(self):
+        """Updates running jobs and starts queued ones while there is room.
+
+        Returns:
+            list of job dicts that were started by this call.
+        """
+        started = []
+        with self._lock:
+            for job in self._jobs:
+                if job['status'] == 'running':
+                    self._update_running(job)
+
+            running = sum(job['status'] == 'running' for job in self._jobs)
+            for job in self._jobs:
+                if running >= self.max_concurrent:
+                    break
+                if job['status'] != 'queued':
+                    continue
+                ok, _ = self.has_headroom()
+                if not ok:
+                    break
+                try:
+                    self._launch(job)
+                except (OSError, subprocess.CalledProcessError) as e:
+                    job['status'], job['finished'] = 'failed', time.time()
+                    print(f"Could not start job {job['id']} ({job['name']}): {e}")
+                    continue
+                running += 1
+                started.append(dict(job))
+                if self.max_load is not None or self.min_free_memory is not None:
+                    # Load and free memory do not reflect a job that just started yet
+                    break
+
+            self._save()
+        return started
+
+    def describe(self, max_finished=5):
+        """Plain-text view of running, queued and recently finished jobs."""
+        jobs = self.jobs()
+        running = [j for j in jobs if j['status'] == 'running']
+        queued = [j for j in jobs if j['status'] == 'queued']
+        finished = sorted((j for j in jobs if j['status'] in ('done', 'failed', 'cancelled')),
+                          key=lambda j: j['finished'] or 0)[-max_finished:]
+
+        lines = [f"Running {len(running)}/{self.max_concurrent}"]
+        for job in running:
+            pin = f" cpus={job['cpus']}" if job['cpus'] else ""
+            lines.append(f"  ▶ #{job['id']} {job['name']}{pin} ({(time.time() - job['started']) / 60:.0f} min)")
+        lines.append(f"Queued {len(queued)}")
+        for i, job in enumerate(queued, 1):
+            lines.append(f"  {i}. #{job['id']} {job['name']}")
+        if queued:
+            ok, reason = self.has_headroom()
+            if not ok:
+                lines.append(f"  (waiting: {reason})")
+        if finished:
+            lines.append("Recently finished")
+            for job in finished:
+                lines.append(f"  {job['status']} #{job['id']} {job['name']}")
+        return "\n".join(lines)
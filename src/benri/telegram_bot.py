@@ -1,49 +1,451 @@
+from __future__ import annotations  # type hints below must not import telegram
 import os
 import sys
 sys.modules['apscheduler'] = None
-import subprocess
+if __package__ in (None, ""):
+    # Run as a script: screen sessions started before the alert spool still call
+    # `python3 .../telegram_bot.py --alert NAME`, so resolve siblings through benri
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "benri"
+import asyncio
+import contextvars
+import functools
 import re
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes, CallbackQueryHandler
-import pytz
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import TYPE_CHECKING
 import json
-from data import aggregate_and_save_top_configs
-import pandas as pd
+import threading
+import time
+from collections import OrderedDict, deque
+from .scheduler import JobScheduler
+from .outbox import Outbox, AlertSpool
+from .writer import write_json_atomic
+from . import profiling
 import ast
 
+# Heavy libraries (telegram, pandas via data, numpy via telemetry) are imported
+# where they are first needed, so alert/status modes start in milliseconds
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import ContextTypes
+
 # ======= GLOBAL CONSTANTS =======
 MY_USER_ID = 6265691693
 STATE_DIR = "/home/carlosR/QTransformer/ExperimentsForThesis/"
 RESULTS_ROOT = "/home/carlosR/QTransformer_Results_and_Datasets/"
 
+@functools.lru_cache(maxsize=None)
+def agg_cache():
+    """Aggregation state per results file; /summary only parses rows appended since the last call."""
+    from .data import AggregationCache
+    return AggregationCache(os.path.join(RESULTS_ROOT, ".benri_cache"), max_entries=128)
+
+# Experiments are started through a local queue so the box is never oversubscribed
+SCHEDULER = JobScheduler(os.path.join(STATE_DIR, ".queue"), max_concurrent=3, executor="screen")
+SCHEDULER_INTERVAL = 15  # seconds between queue checks
+@functools.lru_cache(maxsize=None)
+def telemetry_monitor():
+    """Per-experiment CPU/RSS/IO samples of every job the scheduler starts (1 h at 5 s)."""
+    from .telemetry import TelemetryMonitor
+    return TelemetryMonitor(interval=5.0, capacity=720)
+
+# Every outgoing message goes through one throttled queue; crash alerts arrive via a spool directory
+OUTBOX = Outbox(rate=1.0, burst=5, coalesce_window=10.0)
+ALERTS = AlertSpool(os.path.join(STATE_DIR, ".alerts"))
+ALERT_POLL_INTERVAL = 2  # seconds
+
+# Handlers never block the event loop: file I/O runs in a bounded thread pool,
+# pandas work in a small process pool, and every handler has a timeout
+IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="bot-io")
+COMPUTE_POOL = ProcessPoolExecutor(max_workers=2)
+HANDLER_TIMEOUT = 120   # seconds per handler
+COMMAND_TIMEOUT = 30    # seconds per external command (screen)
+
 # --- Helpers ---
 
-def get_screen_output(screen_id):
-    """Dumps the current screen buffer to a file and reads it."""
+async def run_blocking(func, *args, pool=None, timeout=HANDLER_TIMEOUT, **kwargs):
+    """Runs a blocking function in IO_POOL (or `pool`) without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    pool = pool or IO_POOL
+    if not profiling.is_enabled():
+        call = functools.partial(func, *args, **kwargs)
+        return await asyncio.wait_for(loop.run_in_executor(pool, call), timeout)
+
+    # Spans inside `func` nest under this one: threads get a copy of the context,
+    # worker processes record their own spans and send them back with the result
+    in_process = isinstance(pool, ProcessPoolExecutor)
+    name = getattr(func, "__qualname__", getattr(func, "__name__", "call"))
+    with profiling.span(f"{'compute' if in_process else 'io'}: {name}"):
+        if in_process:
+            call = functools.partial(profiling.collect, func, *args, **kwargs)
+            result, spans = await asyncio.wait_for(loop.run_in_executor(pool, call), timeout)
+            profiling.merge(spans)
+            return result
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return await asyncio.wait_for(loop.run_in_executor(pool, call), timeout)
+
+async def run_command(*cmd, timeout=COMMAND_TIMEOUT):
+    """Runs an external command asynchronously; returns (returncode, stdout, stderr)."""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, stdout.decode(errors="ignore"), stderr.decode(errors="ignore")
+
+def with_timeout(seconds=HANDLER_TIMEOUT):
+    """Decorator: cancels a handler after `seconds` and tells the user."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(update, context):
+            try:
+                with profiling.span(f"/{handler.__name__}"):
+                    return await asyncio.wait_for(handler(update, context), seconds)
+            except asyncio.TimeoutError:
+                target = update.callback_query.message if update.callback_query else update.message
+                await OUTBOX.reply(target, f"⏱️ `{handler.__name__}` timed out after {seconds}s.", parse_mode="Markdown")
+        return wrapper
+    return decorator
+
+def _read_text(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+class LogTailer:
+    """Incremental reader of the run logs written by `execute_experiment_in_screen`.
+
+    Remembers the byte offset of every log file and only reads what was appended
+    since the last call, keeping the most recent `max_lines` lines per experiment
+    in a ring buffer. A log seen for the first time is read from at most its last
+    `initial_bytes`; a truncated (rotated) log is read again from the start.
+    """
+
+    def __init__(self, max_lines=2000, initial_bytes=256 * 1024):
+        self.max_lines = max_lines
+        self.initial_bytes = initial_bytes
+        self._lock = threading.Lock()
+        self._logs = {}  # path -> {'offset', 'partial', 'lines'}
+
+    def read_new(self, path):
+        """Returns the complete lines appended to `path` since the last call."""
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                return []
+            log = self._logs.get(path)
+            if log is None:
+                # Start one byte early: the first chunk is then either empty (we were at
+                # a line start) or a partial line, and is dropped in both cases
+                start = max(0, size - self.initial_bytes - 1)
+                log = {'offset': start, 'partial': b'',
+                       'lines': deque(maxlen=self.max_lines), 'skip_first': start > 0}
+                self._logs[path] = log
+            elif size < log['offset']:
+                log['offset'], log['partial'], log['skip_first'] = 0, b'', False
+                log['lines'].clear()
+
+            if size == log['offset']:
+                return []
+            with open(path, 'rb') as f:
+                f.seek(log['offset'])
+                data = f.read(size - log['offset'])
+            log['offset'] += len(data)
+
+            data = log['partial'] + data
+            chunks = data.split(b'\n')
+            log['partial'] = chunks.pop()
+            if log['skip_first'] and chunks:
+                chunks.pop(0)
+                log['skip_first'] = False
+
+            # screen/tqdm output uses \r to redraw a line; keep only the last redraw
+            new_lines = [c.decode('utf-8', errors='ignore').rsplit('\r', 1)[-1] for c in chunks]
+            log['lines'].extend(new_lines)
+            return new_lines
+
+    def tail(self, path, n=20, pattern=None):
+        """Last `n` lines of `path` (optionally only those matching the regex `pattern`)."""
+        self.read_new(path)
+        with self._lock:
+            log = self._logs.get(path)
+            if log is None:
+                return []
+            lines = list(log['lines'])
+        if pattern:
+            regex = re.compile(pattern)
+            lines = [line for line in lines if regex.search(line)]
+        return lines[-n:]
+
+LOG_NAME = "run.log"
+TAILER = LogTailer()
+
+def experiment_log_path(folder_name):
+    return os.path.join(STATE_DIR, folder_name, LOG_NAME)
+
+async def get_screen_output(screen_id, n=50, pattern=None):
+    """Recent output of an experiment: tails its run log, or asks screen for a hardcopy
+    when the experiment was started without one."""
+    log_path = experiment_log_path(screen_id)
+    if os.path.exists(log_path):
+        return "\n".join(await run_blocking(TAILER.tail, log_path, n, pattern))
+
     tmp_file = f"/tmp/{screen_id}_log.txt"
     # Tells screen to write the current view to a file
-    subprocess.run(["screen", "-S", screen_id, "-X", "hardcopy", tmp_file])
+    await run_command("screen", "-S", screen_id, "-X", "hardcopy", tmp_file)
     if os.path.exists(tmp_file):
-        with open(tmp_file, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
-            print(f"DEBUG LOG CONTENT FOR SCREEN {screen_id}:\n{content}, \nLength: {len(content)}")  # Debug print
-        return content
+        lines = (await run_blocking(_read_text, tmp_file)).rstrip().splitlines()
+        if pattern:
+            lines = [line for line in lines if re.search(pattern, line)]
+        return "\n".join(lines[-n:])
     return ""
 
-def find_all_folders_by_number(short_id):
-    """Returns a list of all folders starting with 'number_'."""
-    matches = []
-    if str(short_id).isdigit():
+class ExperimentRegistry:
+    """In-process index of the experiment folders under STATE_DIR.
+
+    Maps numeric prefixes ('8' -> ['8_Experiment_...']) to folders and caches each
+    folder's parsed state.json and script metadata (experiment_id, graph_columns).
+    The index is built once; afterwards only folders that changed are re-read.
+    Changes come from inotify when the optional `inotify_simple` package is
+    available, otherwise from an mtime poll throttled to `poll_interval` seconds.
+    """
+
+    def __init__(self, state_dir, poll_interval=5.0):
+        self.state_dir = state_dir
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._folders = {}    # folder name -> cached entry
+        self._by_prefix = {}  # numeric prefix -> sorted folder names
+        self._last_poll = 0.0
+        self._dir_mtime = None
+        self._inotify = None
+        self._watches = {}    # inotify watch descriptor -> folder name ('' for state_dir)
+        self._dirty = set()
+        self._built = False
+
+    # --- Index maintenance ---
+
+    def _start_inotify(self):
         try:
-            for folder in os.listdir(STATE_DIR):
-                if folder.startswith(f"{short_id}_") and os.path.isdir(os.path.join(STATE_DIR, folder)):
-                    matches.append(folder)
-        except Exception as e:
+            from inotify_simple import INotify, flags
+        except ImportError:
+            return
+        self._inotify = INotify()
+        self._flags = flags
+        wd = self._inotify.add_watch(self.state_dir, flags.CREATE | flags.DELETE | flags.MOVED_FROM | flags.MOVED_TO)
+        self._watches[wd] = ''
+
+    def _watch_folder(self, folder):
+        if self._inotify is None:
+            return
+        flags = self._flags
+        try:
+            wd = self._inotify.add_watch(os.path.join(self.state_dir, folder),
+                                         flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.DELETE)
+            self._watches[wd] = folder
+        except OSError:
+            pass
+
+    @profiling.profiled("registry: scan")
+    def _scan_folders(self):
+        """Re-list STATE_DIR and add/remove folders; existing entries are kept."""
+        try:
+            names = {e.name for e in os.scandir(self.state_dir) if e.is_dir()}
+        except OSError as e:
             print(f"Error listing folders: {e}")
-    return sorted(matches)
+            return
+        for folder in set(self._folders) - names:
+            del self._folders[folder]
+        for folder in names - set(self._folders):
+            self._folders[folder] = {'dir_mtime': None, 'state_mtime': None, 'state': None, 'state_error': False,
+                                     'script_mtime': None, 'script': None}
+            self._watch_folder(folder)
+            self._dirty.add(folder)
+
+        self._by_prefix = {}
+        for folder in sorted(self._folders):
+            prefix = folder.split('_', 1)[0]
+            if prefix.isdigit() and '_' in folder:
+                self._by_prefix.setdefault(prefix, []).append(folder)
+
+    def _refresh_folder(self, folder):
+        """Re-parse state.json / the WIP_tests_*.py script of a folder if their mtime changed.
+
+        Returns False when state.json was caught half-written, so it is read again
+        on the next refresh; the last good state is kept meanwhile.
+        """
+        entry = self._folders.get(folder)
+        if entry is None:
+            return True
+        folder_path = os.path.join(self.state_dir, folder)
+        complete = True
+        try:
+            entry['dir_mtime'] = os.stat(folder_path).st_mtime_ns
+        except OSError:
+            entry['dir_mtime'] = None
+
+        state_path = os.path.join(folder_path, "state.json")
+        try:
+            mtime = os.stat(state_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime is None:
+            entry['state_mtime'], entry['state'], entry['state_error'] = None, None, False
+        elif mtime != entry['state_mtime']:
+            try:
+                with open(state_path, "r") as f:
+                    state = json.load(f)
+                if not isinstance(state, dict):
+                    raise ValueError("state.json is not an object")
+                entry['state_mtime'], entry['state'], entry['state_error'] = mtime, state, False
+            except (OSError, ValueError):
+                # Partial write by a non-atomic writer: keep the last good state and
+                # leave the mtime unrecorded so the file is re-read next time
+                complete = False
+                entry['state_error'] = entry['state'] is None
+
+        try:
+            script_file = next((f for f in os.listdir(folder_path) if f.startswith("WIP_tests_") and f.endswith(".py")), None)
+        except OSError:
+            script_file = None
+        script_path = os.path.join(folder_path, script_file) if script_file else None
+        try:
+            mtime = (script_file, os.stat(script_path).st_mtime_ns) if script_path else None
+        except OSError:
+            mtime = None
+        if mtime != entry['script_mtime']:
+            entry['script_mtime'], entry['script'] = mtime, None
+            if mtime is not None:
+                entry['script'] = self._parse_script(script_path)
+        return complete
+
+    def _has_changed(self, folder, entry):
+        """True if the folder's listing, state.json or script changed since it was last read (stats only)."""
+        folder_path = os.path.join(self.state_dir, folder)
+        try:
+            if os.stat(folder_path).st_mtime_ns != entry['dir_mtime']:
+                return True  # a file was created, removed or renamed (e.g. an atomic state.json write)
+        except OSError:
+            return True
+        try:
+            state_mtime = os.stat(os.path.join(folder_path, "state.json")).st_mtime_ns
+        except OSError:
+            state_mtime = None
+        if state_mtime != entry['state_mtime']:
+            return True
+        script = entry['script_mtime']
+        if script is None:
+            return False
+        try:
+            return os.stat(os.path.join(folder_path, script[0])).st_mtime_ns != script[1]
+        except OSError:
+            return True
+
+    @staticmethod
+    def _parse_script(script_path):
+        """Extract experiment_id and graph_columns from an experiment script."""
+        info = {'file': os.path.basename(script_path), 'experiment_id': None, 'graph_columns': None}
+        try:
+            with open(script_path, "r") as f:
+                content = f.read()
+            match = re.search(r"'experiment_id':\s*'([^']+)'", content)
+            if match:
+                info['experiment_id'] = match.group(1)
+            match = re.search(r"graph_columns\s*=\s*(\[[^\]]+\])", content)
+            if match:
+                info['graph_columns'] = ast.literal_eval(match.group(1))
+        except (OSError, ValueError, SyntaxError) as e:
+            print(f"Error parsing {script_path}: {e}")
+        return info
+
+    def refresh(self, force=False):
+        """Bring the index up to date; cheap when nothing changed."""
+        with self._lock:
+            if not self._built:
+                self._start_inotify()
+                self._scan_folders()
+                self._built = True
+            elif self._inotify is not None:
+                rescan = False
+                for event in self._inotify.read(timeout=0):
+                    folder = self._watches.get(event.wd)
+                    if folder == '':
+                        rescan = True  # a folder was created, removed or renamed
+                    elif folder is not None:
+                        self._dirty.add(folder)
+                if rescan:
+                    self._scan_folders()
+            else:
+                now = time.monotonic()
+                if not force and now - self._last_poll < self.poll_interval:
+                    return
+                self._last_poll = now
+                try:
+                    dir_mtime = os.stat(self.state_dir).st_mtime_ns
+                except OSError:
+                    dir_mtime = None
+                if dir_mtime != self._dir_mtime:
+                    self._dir_mtime = dir_mtime
+                    self._scan_folders()
+                # Polling cannot tell which folder changed: compare mtimes, re-read only those
+                self._dirty.update(folder for folder, entry in self._folders.items()
+                                   if self._has_changed(folder, entry))
+
+            # Folders whose state.json was mid-write stay dirty for the next refresh
+            if self._dirty:
+                with profiling.span("registry: read states", folders=len(self._dirty)):
+                    self._dirty = {folder for folder in self._dirty if not self._refresh_folder(folder)}
 
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+    # --- Lookups ---
 
+    def find(self, short_id):
+        """All folders starting with '<short_id>_', sorted."""
+        self.refresh()
+        with self._lock:
+            return list(self._by_prefix.get(str(short_id), []))
+
+    def state(self, folder):
+        """(parsed state.json or None, True if state.json exists but could not be read)."""
+        self.refresh()
+        with self._lock:
+            entry = self._folders.get(folder)
+            if entry is None:
+                return None, False
+            return entry['state'], entry['state_error']
+
+    def script_info(self, folder):
+        """{'file', 'experiment_id', 'graph_columns'} of the folder's script, or None."""
+        self.refresh()
+        with self._lock:
+            entry = self._folders.get(folder)
+            return entry['script'] if entry else None
+
+    def experiments(self):
+        """[(folder, state, state_error)] for every folder that has a state.json."""
+        self.refresh()
+        with self._lock:
+            return [(folder, e['state'], e['state_error'])
+                    for folder, e in sorted(self._folders.items())
+                    if e['state_mtime'] is not None or e['state'] is not None or e['state_error']]
+
+REGISTRY = ExperimentRegistry(STATE_DIR)
+
+def find_all_folders_by_number(short_id):
+    """Returns a list of all folders starting with 'number_'."""
+    if not str(short_id).isdigit():
+        return []
+    return REGISTRY.find(short_id)
+
+def find_folder_by_number(short_id):
+    """Resolves '8' to its folder name; returns the argument unchanged if there is no single match."""
+    matches = find_all_folders_by_number(short_id)
+    return matches[0] if len(matches) == 1 else str(short_id)
+
+@with_timeout()
 async def summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != MY_USER_ID: return
     
@@ -54,22 +456,23 @@ async def summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
         folder_name = query.data.replace("sum_", "")
     else:
         if not context.args:
-            await update.message.reply_text("Usage: `/summary [number]`")
+            await OUTBOX.reply(update.message, "Usage: `/summary [number]`")
             return
         
-        matches = find_all_folders_by_number(context.args[0])
+        matches = await run_blocking(find_all_folders_by_number, context.args[0])
         
         if len(matches) == 0:
-            await update.message.reply_text(f"❌ No folders found starting with `{context.args[0]}_`")
+            await OUTBOX.reply(update.message, f"❌ No folders found starting with `{context.args[0]}_`")
             return
         
         if len(matches) > 1:
             # Create buttons for each match
+            from telegram import InlineKeyboardButton, InlineKeyboardMarkup
             keyboard = [
                 [InlineKeyboardButton(m, callback_data=f"sum_{m}")] for m in matches
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
-            await update.message.reply_text(
+            await OUTBOX.reply(update.message, 
                 f"🤔 Multiple experiments found for `{context.args[0]}`. Which one do you want?",
                 reply_markup=reply_markup
             )
@@ -80,44 +483,125 @@ async def summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # --- Processing logic (same as before, using folder_name) ---
     await process_summary_logic(update, folder_name)
 
+def summarize_results(csv_path, group_cols, target_col):
+    """(aggregated frame, median/std table as text best first), or None (runs in COMPUTE_POOL)."""
+    summary_df = agg_cache().aggregate(csv_path, group_cols, target_col)
+    if summary_df is None:
+        return None
+    with profiling.span("format table", rows=len(summary_df)):
+        return summary_df, summary_df.sort_values(by='median', ascending=False).to_string(index=False)
+
+def _file_fingerprint(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def _fresh_results_path(csv_path):
+    """The Feather/Parquet copy of `csv_path` if one is at least as new as the CSV, else `csv_path`.
+
+    While a run is still appending to the CSV its columnar copy lags behind, so
+    reading the copy would show stale results.
+    """
+    try:
+        csv_mtime = os.stat(csv_path).st_mtime_ns
+    except OSError:
+        csv_mtime = None
+    for ext in (".feather", ".parquet"):
+        columnar_path = csv_path[:-len(".csv")] + ext
+        try:
+            columnar_mtime = os.stat(columnar_path).st_mtime_ns
+        except OSError:
+            continue
+        if csv_mtime is None or columnar_mtime >= csv_mtime:
+            return columnar_path
+    return csv_path
+
+class SummaryCache:
+    """LRU cache of rendered summaries with single-flight computation.
+
+    Entries are keyed on (experiment id, group columns, target column) and hold
+    the aggregated frame and its rendered text together with the mtime/size of
+    the results file they came from; a changed file invalidates the entry.
+    Concurrent requests for the same summary share one computation.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (fingerprint, result)
+        self._inflight = {}            # (key, fingerprint) -> asyncio.Task
+
+    async def get(self, exp_id, csv_path, group_cols, target_col):
+        """(summary_df, text) for the current content of `csv_path`, or None if it holds no rows."""
+        key = (exp_id, tuple(group_cols), target_col)
+        fingerprint = await run_blocking(_file_fingerprint, csv_path)
+
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            self._entries.move_to_end(key)
+            return cached[1]
+
+        flight = (key, fingerprint)
+        task = self._inflight.get(flight)
+        if task is None:
+            task = asyncio.ensure_future(
+                run_blocking(summarize_results, csv_path, list(group_cols), target_col, pool=COMPUTE_POOL)
+            )
+            self._inflight[flight] = task
+            task.add_done_callback(lambda t: self._store(flight, t))
+
+        # shield: a timed-out request must not cancel the computation others wait on
+        return await asyncio.shield(task)
+
+    def _store(self, flight, task):
+        self._inflight.pop(flight, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        key, fingerprint = flight
+        self._entries[key] = (fingerprint, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+SUMMARY_CACHE = SummaryCache()
+
 async def process_summary_logic(update, folder_name):
     # Determine if we are replying to a message or a callback query
     target = update.callback_query.message if update.callback_query else update.message
     
-    folder_path = os.path.join(STATE_DIR, folder_name)
-    
-    # 1. Find the script file: WIP_tests_*.py
-    script_file = next((f for f in os.listdir(folder_path) if f.startswith("WIP_tests_") and f.endswith(".py")), None)
+    # 1. Script metadata (WIP_tests_*.py), parsed once per script change by the registry
+    script = await run_blocking(REGISTRY.script_info, folder_name)
     
-    if not script_file:
-        await target.reply_text(f"❌ No script found in `{folder_name}`")
+    if not script:
+        await OUTBOX.reply(target, f"❌ No script found in `{folder_name}`")
         return
 
     try:
-        script_full_path = os.path.join(folder_path, script_file)
-        with open(script_full_path, "r") as f:
-            content = f.read()
+        exp_id_val = script['experiment_id']
+        graph_cols = script['graph_columns']
+        if exp_id_val is None or graph_cols is None:
+            raise ValueError(f"could not find experiment_id/graph_columns in {script['file']}")
 
-        # Extract values (Using the regex from our previous step)
-        exp_id_val = re.search(r"'experiment_id':\s*'([^']+)'", content).group(1)
-        graph_cols = ast.literal_eval(re.search(r"graph_columns\s*=\s*(\[[^\]]+\])", content).group(1))
-
-        # 2. Path to CSV
+        # 2. Path to results, preferring an up-to-date columnar copy when the experiment writes one
         csv_path = f"/home/carlosR/QTransformer_Results_and_Datasets/{exp_id_val}/results_grid_search.csv"
+        csv_path = await run_blocking(_fresh_results_path, csv_path)
         
-        df = pd.read_csv(csv_path)
         group_cols = graph_cols[:-1]
         target_col = graph_cols[-1]
 
-        summary_df = df.groupby(group_cols)[target_col].agg(['median', 'std']).reset_index()
-        result_text = summary_df.sort_values(by='median', ascending=False).to_string(index=False)
+        # Parsing and groupby run in the process pool
+        result = await SUMMARY_CACHE.get(exp_id_val, csv_path, group_cols, target_col)
+        if result is None:
+            await OUTBOX.reply(target, f"📭 No results yet for `{folder_name}`")
+            return
+        _, result_text = result
 
         header = f"📊 *Summary:* `{folder_name}`\n"
-        await target.reply_text(f"{header}```\n{result_text[:3000]}\n```", parse_mode="Markdown")
+        # Long summaries are split into pages instead of truncated
+        await OUTBOX.reply(target, result_text, header=header, code=True, parse_mode="Markdown")
 
     except Exception as e:
-        await target.reply_text(f"❌ Error processing summary for `{folder_name}`: {e}")
+        await OUTBOX.reply(target, f"❌ Error processing summary for `{folder_name}`: {e}")
 
+@with_timeout()
 async def list_experiments(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != MY_USER_ID:
         return
@@ -128,35 +612,29 @@ async def list_experiments(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         found_experiments = []
         
-        # Walk through the directory tree
-        for root, dirs, files in os.walk(STATE_DIR):
-            if "state.json" in files:
-                folder_name = os.path.basename(root)
-                file_path = os.path.join(root, "state.json")
-                
-                try:
-                    with open(file_path, "r") as f:
-                        data = json.load(f)
-                    
-                    # Extract data and normalize status for comparison
-                    current_status = data.get('status', 'unknown').lower()
-                    idx = data.get('idx', '?')
-                    total = data.get('total', '?')
-                    
-                    # Check if this experiment matches the requested filter
-                    # We use 'in' to handle cases like "COMPLETED ✅" vs "completed"
-                    if filter_status in current_status:
-                        found_experiments.append(
-                            f"• `{folder_name}`\n"
-                            f"  └ {idx}/{total} | {data.get('status', 'running')}"
-                        )
-                except Exception:
-                    # If we can't read the JSON, we only show it if specifically looking for errors
-                    if filter_status == "error":
-                        found_experiments.append(f"• `{folder_name}`\n  └ ⚠️ Error reading JSON")
+        # Parsed states come from the registry; only changed state.json files are re-read
+        for folder_name, data, state_error in await run_blocking(REGISTRY.experiments):
+            if state_error or data is None:
+                # If we can't read the JSON, we only show it if specifically looking for errors
+                if filter_status == "error":
+                    found_experiments.append(f"• `{folder_name}`\n  └ ⚠️ Error reading JSON")
+                continue
+
+            # Extract data and normalize status for comparison
+            current_status = str(data.get('status', 'unknown')).lower()
+            idx = data.get('idx', '?')
+            total = data.get('total', '?')
+
+            # Check if this experiment matches the requested filter
+            # We use 'in' to handle cases like "COMPLETED ✅" vs "completed"
+            if filter_status in current_status:
+                found_experiments.append(
+                    f"• `{folder_name}`\n"
+                    f"  └ {idx}/{total} | {data.get('status', 'running')}"
+                )
 
         if not found_experiments:
-            await update.message.reply_text(
+            await OUTBOX.reply(update.message, 
                 f"📂 No experiments found with status: `{filter_status}`"
             )
             return
@@ -165,55 +643,238 @@ async def list_experiments(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         header = f"🔬 *Thesis Experiments ({filter_status.upper()}):*\n\n"
         response = header + "\n\n".join(found_experiments)
-        await update.message.reply_text(response, parse_mode="Markdown")
+        await OUTBOX.reply(update.message, response, parse_mode="Markdown")
 
     except Exception as e:
-        await update.message.reply_text(f"❌ Error scanning directory: `{e}`")
+        await OUTBOX.reply(update.message, f"❌ Error scanning directory: `{e}`")
+
+# --- Live Progress ---
+
+def _format_duration(seconds):
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours}h {minutes:02d}m"
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours:02d}h"
+
+class ProgressWatcher:
+    """Single loop that follows the state.json of every running experiment.
+
+    Keeps a rolling (time, idx) history per experiment, sampled on every tick, to
+    estimate throughput and ETA, and pushes one combined status message, pinned
+    and then edited in place. The message id is saved in `state_path`, so a
+    restarted bot keeps editing the same message. Edits are rate-limited to one
+    per `min_edit_interval` seconds, skipped when nothing changed, and never
+    overlap. One loop serves any number of experiments.
+    """
+
+    def __init__(self, chat_id, interval=15.0, min_edit_interval=60.0, history=50, state_path=None):
+        self.chat_id = chat_id
+        self.interval = interval
+        self.min_edit_interval = min_edit_interval
+        self.history = history
+        self.state_path = state_path
+        self._history = {}     # folder -> deque[(timestamp, idx)]
+        self._states = {}      # folder -> last running state
+        self._message_id = None  # loaded from state_path when the loop starts
+        self._last_text = None
+        self._last_edit = 0.0
+        self._lock = asyncio.Lock()  # /watch and the loop must not edit at the same time
+
+    def _load_message_id(self):
+        if self.state_path is None:
+            return None
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+            return state['message_id'] if state.get('chat_id') == self.chat_id else None
+        except (OSError, ValueError, KeyError, AttributeError):
+            return None
+
+    def _save_message_id(self):
+        if self.state_path is None:
+            return
+        try:
+            write_json_atomic(self.state_path, {'chat_id': self.chat_id, 'message_id': self._message_id})
+        except OSError as e:
+            print(f"Could not save the progress message id: {e}")
+
+    def observe(self, experiments, now=None):
+        """Records the idx of running experiments; forgets the ones that stopped."""
+        now = time.time() if now is None else now
+        running = {}
+        for folder, data, state_error in experiments:
+            if state_error or not data or 'running' not in str(data.get('status', 'running')).lower():
+                continue
+            try:
+                idx = int(data['idx'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            running[folder] = data
+            samples = self._history.setdefault(folder, deque(maxlen=self.history))
+            if samples and idx < samples[-1][1]:
+                samples.clear()  # restarted from scratch
+            # Sample every tick, so a stalled run decays to zero progress
+            samples.append((now, idx))
+
+        for folder in set(self._history) - set(running):
+            del self._history[folder]
+        self._states = running
+
+    def rate(self, folder):
+        """(steps per second, ETA in seconds) from the rolling history, or (None, None)."""
+        samples = self._history.get(folder)
+        data = self._states.get(folder)
+        if not samples or len(samples) < 2 or data is None:
+            return None, None
+        (t0, i0), (t1, i1) = samples[0], samples[-1]
+        if t1 <= t0:
+            return None, None
+        steps_per_second = (i1 - i0) / (t1 - t0)
+        if steps_per_second <= 0:
+            return 0.0, None  # stalled: no ETA
+        try:
+            remaining = max(0, int(data['total']) - i1)
+        except (KeyError, TypeError, ValueError):
+            return steps_per_second, None
+        return steps_per_second, remaining / steps_per_second
+
+    def render(self):
+        if not self._states:
+            return "📡 *Live progress*\nNo running experiments."
+        lines = ["📡 *Live progress*"]
+        for folder in sorted(self._states):
+            data = self._states[folder]
+            idx, total = data.get('idx', '?'), data.get('total', '?')
+            steps_per_second, eta = self.rate(folder)
+            line = f"• `{folder}` {idx}/{total}"
+            if steps_per_second is not None:
+                line += f" | {steps_per_second * 60:.1f}/min"
+            if eta is not None:
+                line += f" | ETA {_format_duration(eta)}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    async def push(self, bot, force=False, new_message=False):
+        """Edits the status message (or sends and pins one); `new_message` starts a fresh one."""
+        async with self._lock:
+            if new_message:
+                self._message_id, self._last_text = None, None
+            await self._push(bot, force)
+
+    async def _push(self, bot, force):
+        text = self.render()
+        now = time.monotonic()
+        if text == self._last_text:
+            return
+        if not force and self._message_id is not None and now - self._last_edit < self.min_edit_interval:
+            return
+
+        if self._message_id is not None:
+            try:
+                await OUTBOX.call(bot.edit_message_text, text, chat_id=self.chat_id, message_id=self._message_id,
+                                  parse_mode="Markdown")
+            except Exception as e:
+                if "not modified" not in str(e).lower():
+                    self._message_id = None  # deleted or too old: send a new one below
+        if self._message_id is None:
+            message = await OUTBOX.send(self.chat_id, text, parse_mode="Markdown")
+            self._message_id = message.message_id
+            await run_blocking(self._save_message_id)
+            try:
+                await OUTBOX.call(bot.pin_chat_message, chat_id=self.chat_id, message_id=message.message_id,
+                                  disable_notification=True)
+            except Exception as e:
+                print(f"Could not pin progress message: {e}")
+
+        self._last_text = text
+        self._last_edit = now
+
+    async def run(self, bot):
+        async with self._lock:
+            if self._message_id is None:
+                self._message_id = await run_blocking(self._load_message_id)
+        while True:
+            try:
+                self.observe(await run_blocking(REGISTRY.experiments))
+                await self.push(bot)
+            except Exception as e:
+                print(f"Progress watcher error: {e}")
+            await asyncio.sleep(self.interval)
+
+WATCHER = ProgressWatcher(MY_USER_ID, state_path=os.path.join(STATE_DIR, ".watcher.json"))
+
+@with_timeout()
+async def watch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Posts a fresh pinned live-progress message (the watcher keeps editing it)."""
+    if update.effective_user.id != MY_USER_ID: return
+    WATCHER.observe(await run_blocking(REGISTRY.experiments))
+    await WATCHER.push(context.bot, force=True, new_message=True)
 
 # --- Command Handlers ---
+@with_timeout()
 async def progress(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != MY_USER_ID: return
     if not context.args:
-        await update.message.reply_text("Usage: `/progress [number or name]`", parse_mode="Markdown")
+        await OUTBOX.reply(update.message, "Usage: `/progress [number or name]`", parse_mode="Markdown")
         return
     
     # Resolve the ID (handles '8' -> '8_Experiment_...')
-    folder_name = find_folder_by_number(context.args[0])
-    state_file = os.path.join(STATE_DIR, folder_name, "state.json")
+    folder_name = await run_blocking(find_folder_by_number, context.args[0])
+    data, state_error = await run_blocking(REGISTRY.state, folder_name)
 
-    if os.path.exists(state_file):
-        with open(state_file, "r") as f:
-            data = json.load(f)
-        
-        idx, total = int(data['idx']), int(data['total'])
-        percent = min(100, int((idx / total) * 100))
+    if data is not None:
+        # Tolerate states written before idx/total are known
+        try:
+            idx, total = int(data['idx']), int(data['total'])
+            percent = max(0, min(100, int((idx / total) * 100)))
+        except (KeyError, TypeError, ValueError, ZeroDivisionError):
+            idx, total, percent = data.get('idx', '?'), data.get('total', '?'), 0
         bar = "█" * (percent // 10) + "░" * (10 - (percent // 10))
 
-        await update.message.reply_text(
+        # Throughput and ETA from the live watcher's history, once it has two samples
+        steps_per_second, eta = WATCHER.rate(folder_name)
+        speed = ""
+        if steps_per_second is not None:
+            speed = f"Speed: `{steps_per_second * 60:.1f}` steps/min"
+            speed += f" | ETA: `{_format_duration(eta)}`\n" if eta is not None else "\n"
+
+        await OUTBOX.reply(update.message, 
             f"📊 *Progress:* `{folder_name}`\n"
             f"Step: `{idx}` / `{total}`\n"
             f"`{bar}` {percent}%\n"
+            f"{speed}"
             f"Status: *{data.get('status', 'running')}*",
             parse_mode="Markdown"
         )
+    elif state_error:
+        await OUTBOX.reply(update.message, f"⏳ `{folder_name}` is writing its state.json; try again in a moment.",
+                           parse_mode="Markdown")
     else:
-        await update.message.reply_text(f"❌ Folder/File not found for: `{folder_name}`")
+        await OUTBOX.reply(update.message, f"❌ Folder/File not found for: `{folder_name}`")
 
+@with_timeout()
 async def list_screens(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Security check
     if update.effective_user.id != MY_USER_ID:
         return
 
     try:
-        # We use check=False because screen -ls returns code 1 if no screens exist
-        result = subprocess.run(['screen', '-ls'], capture_output=True, text=True, check=False)
-        output = result.stdout + result.stderr # Screen sometimes prints list to stderr
+        # screen -ls returns code 1 if no screens exist, so the return code is ignored
+        _, stdout, stderr = await run_command('screen', '-ls')
+        output = stdout + stderr # Screen sometimes prints list to stderr
 
         # Debug print in your terminal to see what the bot sees
         print(f"DEBUG SCREEN OUTPUT:\n{output}")
 
         if "No Sockets found" in output or not output.strip():
-            await update.message.reply_text("📭 No active screen sessions found.")
+            await OUTBOX.reply(update.message, "📭 No active screen sessions found.")
             return
 
         # Improved Regex: 
@@ -227,35 +888,43 @@ async def list_screens(update: Update, context: ContextTypes.DEFAULT_TYPE):
             response = "🖥️ *Active Screen Sessions:*\n\n"
             for name in unique_screens:
                 response += f"• `{name}`\n"
-            await update.message.reply_text(response, parse_mode="Markdown")
+            await OUTBOX.reply(update.message, response, parse_mode="Markdown")
         else:
             # If regex fails, show the raw output so we can see the format
-            await update.message.reply_text(f"Could not parse screens. Raw output:\n`{output}`", parse_mode="Markdown")
+            await OUTBOX.reply(update.message, f"Could not parse screens. Raw output:\n`{output}`", parse_mode="Markdown")
             
     except Exception as e:
-        await update.message.reply_text(f"❌ Error listing screens: {e}")
+        await OUTBOX.reply(update.message, f"❌ Error listing screens: {e}")
 
+@with_timeout()
 async def start_exp(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != MY_USER_ID: return
     
     query = update.callback_query
     if query:
         await query.answer()
-        folder_name = query.data.replace("start_", "")
+        # Buttons carry the options of the /start that offered them: "start_<folder>[ cpus=<list>]"
+        folder_name, _, cpus = query.data[len("start_"):].partition(" cpus=")
+        cpus = cpus or None
     else:
         if not context.args:
-            await update.message.reply_text("Usage: `/start [number]`")
+            await OUTBOX.reply(update.message, "Usage: `/start [number] [cpus=0-3]`")
             return
+
+        # Optional CPU pinning: /start 8 cpus=0-3
+        cpus = next((a.split("=", 1)[1] for a in context.args[1:] if a.startswith("cpus=")), None)
         
-        matches = find_all_folders_by_number(context.args[0])
+        matches = await run_blocking(find_all_folders_by_number, context.args[0])
         
         if len(matches) == 0:
-            await update.message.reply_text(f"❌ No folders found starting with `{context.args[0]}_`")
+            await OUTBOX.reply(update.message, f"❌ No folders found starting with `{context.args[0]}_`")
             return
         
         if len(matches) > 1:
-            keyboard = [[InlineKeyboardButton(m, callback_data=f"start_{m}")] for m in matches]
-            await update.message.reply_text(
+            from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+            option = f" cpus={cpus}" if cpus else ""
+            keyboard = [[InlineKeyboardButton(m, callback_data=f"start_{m}{option}")] for m in matches]
+            await OUTBOX.reply(update.message, 
                 f"🚀 Found multiple options for `{context.args[0]}`. Which one should I start?",
                 reply_markup=InlineKeyboardMarkup(keyboard)
             )
@@ -264,64 +933,290 @@ async def start_exp(update: Update, context: ContextTypes.DEFAULT_TYPE):
         folder_name = matches[0]
 
     # --- Trigger the Execution Logic ---
-    await execute_experiment_in_screen(update, folder_name)
+    await execute_experiment_in_screen(update, folder_name, cpus=cpus)
 
-async def execute_experiment_in_screen(update, folder_name):
+async def execute_experiment_in_screen(update, folder_name, cpus=None):
+    """Queues the experiment in SCHEDULER; it starts in a screen session as soon as there is room."""
     target = update.callback_query.message if update.callback_query else update.message
     
     folder_full_path = os.path.join(STATE_DIR, folder_name)
     script_path = os.path.join(folder_full_path, "WIP_tests_Transformer.py")
-    bot_path = os.path.abspath(__file__)
 
     if os.path.exists(script_path):
-        # The bash command with the '||' (OR) alert hook
+        # The bash command with the '||' (OR) alert hook, which drops a file in the
+        # alert spool and exits with python's code, so the queue records the failure;
+        # output is also appended to the run log (pipefail keeps python's exit code)
         inner_cmd = (
-            f"cd {folder_full_path} && "
-            f"python3 WIP_tests_Transformer.py || "
-            f"python3 {bot_path} --alert {folder_name}"
+            f"cd {folder_full_path} && set -o pipefail && "
+            f"python3 -u WIP_tests_Transformer.py 2>&1 | tee -a {LOG_NAME} || "
+            f"{ALERTS.shell_hook(folder_name)}"
         )
         
-        subprocess.run(["screen", "-dmS", folder_name, "-h", "10000", "bash", "-c", inner_cmd])
-        await target.reply_text(f"✅ Started `{folder_name}`.\nYou'll be notified if it fails.")
+        job = await run_blocking(SCHEDULER.submit, folder_name, inner_cmd, folder_full_path, cpus)
+        started = await run_blocking(SCHEDULER.poll)
+        if any(j['id'] == job['id'] for j in started):
+            await OUTBOX.reply(target, f"✅ Started `{folder_name}`.\nYou'll be notified if it fails.")
+        else:
+            position = await run_blocking(SCHEDULER.position, job['id'])
+            await OUTBOX.reply(target, 
+                f"⏳ Queued `{folder_name}` as job #{job['id']} (position {position}).\n"
+                f"It starts automatically when a slot frees up; see /queue."
+            )
     else:
-        await target.reply_text(f"❌ Script not found: `{script_path}`")
+        await OUTBOX.reply(target, f"❌ Script not found: `{script_path}`")
 
+@with_timeout()
 async def kill_exp(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != MY_USER_ID: return
     if not context.args: return
     
     # Resolve the ID
-    screen_id = find_folder_by_number(context.args[0])
+    screen_id = await run_blocking(find_folder_by_number, context.args[0])
     
     # Terminate the screen session
-    subprocess.run(["screen", "-S", screen_id, "-X", "quit"])
-    await update.message.reply_text(f"💀 Session `{screen_id}` terminated.")
+    await run_command("screen", "-S", screen_id, "-X", "quit")
+    await OUTBOX.reply(update.message, f"💀 Session `{screen_id}` terminated.")
+
+@with_timeout()
+async def show_log(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/log [number] [lines] [regex] — last lines of an experiment's output."""
+    if update.effective_user.id != MY_USER_ID: return
+    if not context.args:
+        await OUTBOX.reply(update.message, "Usage: `/log [number] [lines] [regex]`", parse_mode="Markdown")
+        return
+
+    folder_name = await run_blocking(find_folder_by_number, context.args[0])
+    # The line count is optional: "/log 3 error" is a pattern, "/log 3 50 error" both
+    args = context.args[1:]
+    n = 30
+    if args and re.fullmatch(r"-?\d+", args[0]):
+        n = int(args.pop(0))
+        if n < 1:
+            await OUTBOX.reply(update.message, "❌ The number of lines must be at least 1.")
+            return
+    pattern = " ".join(args) or None
+    try:
+        output = await get_screen_output(folder_name, n=n, pattern=pattern)
+    except re.error as e:
+        await OUTBOX.reply(update.message, f"❌ Invalid regex: `{e}`", parse_mode="Markdown")
+        return
+
+    if not output.strip():
+        await OUTBOX.reply(update.message, f"📭 No output for `{folder_name}`", parse_mode="Markdown")
+        return
+    await OUTBOX.reply(update.message, output, header=f"📜 *Log:* `{folder_name}`\n", code=True, parse_mode="Markdown")
+
+@with_timeout()
+async def queue(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/queue — scheduler state; /queue cancel [job id] — drop a queued job."""
+    if update.effective_user.id != MY_USER_ID: return
+    if context.args and context.args[0] == "cancel":
+        if len(context.args) < 2 or not context.args[1].isdigit():
+            await OUTBOX.reply(update.message, "Usage: `/queue cancel [job id]`", parse_mode="Markdown")
+            return
+        cancelled = await run_blocking(SCHEDULER.cancel, int(context.args[1]))
+        await OUTBOX.reply(update.message, "🗑️ Cancelled." if cancelled else "❌ No queued job with that id.")
+        return
+
+    text = await run_blocking(SCHEDULER.describe)
+    await OUTBOX.reply(update.message, f"🗂️ *Job queue*\n```\n{text}\n```", parse_mode="Markdown")
+
+@with_timeout()
+async def perf(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/perf on [mem] | off | reset | trace — timing spans of the bot and benri (summary without args)."""
+    if update.effective_user.id != MY_USER_ID: return
+    action = context.args[0].lower() if context.args else ""
+    if action == "on":
+        memory = len(context.args) > 1 and context.args[1].lower().startswith("mem")
+        profiling.enable(memory=memory)
+        await OUTBOX.reply(update.message, "⏱️ Profiling on" + (" (with allocations)." if memory else "."))
+    elif action == "off":
+        profiling.disable()
+        await OUTBOX.reply(update.message, "⏱️ Profiling off; spans kept until `/perf reset`.", parse_mode="Markdown")
+    elif action == "reset":
+        profiling.reset()
+        await OUTBOX.reply(update.message, "🧹 Spans cleared.")
+    elif action == "trace":
+        trace = await run_blocking(lambda: json.dumps(profiling.export_chrome_trace()).encode())
+        await OUTBOX.call(update.message.reply_document, document=trace, filename="benri_trace.json",
+                          caption="Open in chrome://tracing or ui.perfetto.dev")
+    elif action:
+        await OUTBOX.reply(update.message, "Usage: `/perf [on [mem]|off|reset|trace]`", parse_mode="Markdown")
+    else:
+        text = await run_blocking(profiling.summary)
+        state = "on" if profiling.is_enabled() else "off"
+        await OUTBOX.reply(update.message, text, header=f"⏱️ *Profile* ({state})\n", code=True, parse_mode="Markdown")
+
+def _graphics():
+    """benri.graphics (imported on first use; matplotlib is heavy)."""
+    from . import graphics
+    return graphics
+
+def _render_usage_png(folder_name):
+    """PNG chart of an experiment's resource usage, or None if it has no samples."""
+    sampler = telemetry_monitor().get(folder_name)
+    if sampler is None or len(sampler.series()) < 2:
+        return None
+    return _graphics().render_resource_usage(sampler.series(), title=folder_name)
+
+# Live plots per (folder, y, x); each one only reads the rows added since the last /curves
+LIVE_CURVES = OrderedDict()
+LIVE_CURVES_MAX = 8
+_LIVE_CURVES_LOCK = threading.Lock()
+
+def _render_live_curves(folder_name, y=None, x=None):
+    """PNG of an experiment's results curve (y defaults to the target column), or None without results."""
+    script = REGISTRY.script_info(folder_name)
+    if not script or script['experiment_id'] is None or not script['graph_columns']:
+        return None
+    csv_path = os.path.join(RESULTS_ROOT, script['experiment_id'], "results_grid_search.csv")
+    if not os.path.exists(csv_path):
+        return None
+
+    key = (folder_name, y, x)
+    with _LIVE_CURVES_LOCK:
+        live = LIVE_CURVES.get(key)
+        if live is None:
+            live = _graphics().LiveCurves(csv_path, y or script['graph_columns'][-1], x=x, title=folder_name)
+            LIVE_CURVES[key] = live
+            while len(LIVE_CURVES) > LIVE_CURVES_MAX:
+                LIVE_CURVES.popitem(last=False)
+        LIVE_CURVES.move_to_end(key)
+    try:
+        live.poll()
+    except (KeyError, ValueError):
+        # Unknown column: do not keep the broken plot around
+        with _LIVE_CURVES_LOCK:
+            LIVE_CURVES.pop(key, None)
+        raise
+    return live.render_png()
+
+@with_timeout()
+async def usage(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/usage [number] [png] — current and peak CPU, memory and IO of a running experiment."""
+    if update.effective_user.id != MY_USER_ID: return
+    if not context.args:
+        names = await run_blocking(lambda: telemetry_monitor().names())
+        text = "\n".join(f"• `{name}`" for name in names) or "No sampled experiments."
+        await OUTBOX.reply(update.message, f"🩺 *Sampled experiments*\n{text}\nUsage: `/usage [number] [png]`",
+                                        parse_mode="Markdown")
+        return
+
+    folder_name = await run_blocking(find_folder_by_number, context.args[0])
+    sampler = await run_blocking(lambda: telemetry_monitor().get(folder_name))
+    if sampler is None:
+        await OUTBOX.reply(update.message, f"❌ No resource samples for `{folder_name}` (not started by the queue?)",
+                                        parse_mode="Markdown")
+        return
+
+    if len(context.args) > 1 and context.args[1].lower() == "png":
+        png = await run_blocking(_render_usage_png, folder_name)
+        if png is None:
+            await OUTBOX.reply(update.message, "⏳ Not enough samples yet.")
+        else:
+            await OUTBOX.call(update.message.reply_photo, photo=png, caption=f"Resource usage: {folder_name}")
+        return
+
+    report = await run_blocking(sampler.report)
+    await OUTBOX.reply(update.message, f"🩺 *Usage:* `{folder_name}`\n```\n{report}\n```", parse_mode="Markdown")
+
+@with_timeout()
+async def curves(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/curves [number] [y column] [x column] — live plot of an experiment's results (x: row number by default)."""
+    if update.effective_user.id != MY_USER_ID: return
+    if not context.args:
+        await OUTBOX.reply(update.message, "Usage: `/curves [number] [y column] [x column]`", parse_mode="Markdown")
+        return
+
+    folder_name = await run_blocking(find_folder_by_number, context.args[0])
+    y = context.args[1] if len(context.args) > 1 else None
+    x = context.args[2] if len(context.args) > 2 else None
+    try:
+        png = await run_blocking(_render_live_curves, folder_name, y, x)
+    except (OSError, KeyError, ValueError) as e:
+        await OUTBOX.reply(update.message, f"❌ Could not plot `{folder_name}`: {e}", parse_mode="Markdown")
+        return
+    if png is None:
+        await OUTBOX.reply(update.message, f"📭 No results yet for `{folder_name}`", parse_mode="Markdown")
+        return
+    await OUTBOX.call(update.message.reply_photo, photo=png, caption=f"Live curves: {folder_name}")
+
+def _sync_telemetry():
+    """Attach a resource sampler to every running job that has written its pid (blocking /proc reads)."""
+    telemetry_monitor().sync({job['name']: job['pid'] for job in SCHEDULER.jobs(('running',))})
+
+async def run_scheduler(bot):
+    """Starts queued experiments as slots free up and reports each start."""
+    while True:
+        try:
+            for job in await run_blocking(SCHEDULER.poll):
+                await OUTBOX.send(MY_USER_ID, f"▶️ Started queued `{job['name']}` (job #{job['id']}).",
+                                  parse_mode="Markdown")
+            # Attach the resource sampler once a job has written its pid
+            await run_blocking(_sync_telemetry)
+        except Exception as e:
+            print(f"Scheduler error: {e}")
+        await asyncio.sleep(SCHEDULER_INTERVAL)
+
+async def run_alerts():
+    """Drains the crash-alert spool into the outbox, which coalesces bursts of failures."""
+    while True:
+        try:
+            for name, code in await run_blocking(ALERTS.drain):
+                exit_info = f" (exit {code})" if code is not None else ""
+                OUTBOX.alert(MY_USER_ID, name, f"🚨 *CRASH:* Experiment `{name}` failed{exit_info}.")
+        except Exception as e:
+            print(f"Alert spool error: {e}")
+        await asyncio.sleep(ALERT_POLL_INTERVAL)
 
 # --- Main Entry Point ---
 
-from telegram.ext import Application
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
 
-if __name__ == "__main__":
     # --- Emergency Alert CLI Mode ---
-    if len(sys.argv) > 2 and sys.argv[1] == "--alert":
-        import asyncio
-        from telegram import Bot
-        async def send_emergency():
-            bot = Bot(token="YOUR_TOKEN")
-            await bot.send_message(chat_id=MY_USER_ID, text=f"🚨 **CRASH:** Experiment `{sys.argv[2]}` failed.")
-        asyncio.run(send_emergency())
-        sys.exit(0)
+    # Kept for sessions started with the old hook; the running bot delivers it
+    if len(argv) > 1 and argv[0] == "--alert":
+        ALERTS.write(argv[1])
+        return 0
 
     # --- Standard Bot Mode ---
-    app = Application.builder().token("YOUR_TOKEN").job_queue(None).build()
+    from telegram.ext import Application, CommandHandler, CallbackQueryHandler
+
+    async def post_init(application):
+        OUTBOX.start(application.bot)
+        application.create_task(run_alerts())
+        # One background loop follows every running experiment
+        application.create_task(WATCHER.run(application.bot))
+        application.create_task(run_scheduler(application.bot))
+
+    # concurrent_updates: a slow /summary must not hold back /progress or /list
+    app = (Application.builder().token("YOUR_TOKEN").job_queue(None).concurrent_updates(True)
+           .post_init(post_init).build())
     
     # Handlers
     app.add_handler(CommandHandler("start", start_exp))
     app.add_handler(CommandHandler("summary", summary)) # Existing
+    app.add_handler(CommandHandler("list", list_experiments))
+    app.add_handler(CommandHandler("progress", progress))
+    app.add_handler(CommandHandler("screens", list_screens))
+    app.add_handler(CommandHandler("kill", kill_exp))
+    app.add_handler(CommandHandler("watch", watch))
+    app.add_handler(CommandHandler("log", show_log))
+    app.add_handler(CommandHandler("queue", queue))
+    app.add_handler(CommandHandler("usage", usage))
+    app.add_handler(CommandHandler("perf", perf))
+    app.add_handler(CommandHandler("curves", curves))
     
     # Callback Handlers for Buttons
     app.add_handler(CallbackQueryHandler(start_exp, pattern="^start_"))
     app.add_handler(CallbackQueryHandler(summary, pattern="^sum_"))
     
     print("🚀 Bot is listening with selection and crash alerts...")
-    app.run_polling()
\ No newline at end of file
+    app.run_polling()
+    return 0
+
+# Run with `benri bot` or `python -m benri.telegram_bot`; running the file directly
+# also works (see the __package__ fallback at the top)
+if __name__ == "__main__":
+    sys.exit(main())
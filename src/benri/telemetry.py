@@ -0,0 +1,272 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# One row per sample; counters (cpu_ticks, read/write bytes) are cumulative over the process tree
+SAMPLE_DTYPE = np.dtype([
+    ('time', 'f8'), ('cpu', 'f4'), ('rss', 'i8'), ('swap', 'i8'),
+    ('read', 'i8'), ('write', 'i8'), ('threads', 'i4'), ('procs', 'i4'),
+])
+
+_SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+def _children(pid):
+    """Direct children of `pid`, via /proc/<pid>/task/*/children when the kernel has it."""
+    children = []
+    try:
+        tids = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return children
+    for tid in tids:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children", "r") as f:
+                children.extend(int(c) for c in f.read().split())
+        except OSError:
+            continue
+    return children
+
+def _process_tree(pid):
+    """`pid` and all its live descendants (the screen shell, python, its workers...)."""
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(_children(current))
+    return tree
+
+def _read_process(pid):
+    """(cpu ticks, rss bytes, swap bytes, read bytes, write bytes, threads) of one process, or None if gone."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # The command name may contain spaces; fields after it are fixed
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = int(fields[11]) + int(fields[12])
+        threads = int(fields[17])
+
+        rss = swap = 0
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith("VmSwap:"):
+                    swap = int(line.split()[1]) * 1024
+    except (OSError, IndexError, ValueError):
+        return None
+
+    read = write = 0
+    try:
+        with open(f"/proc/{pid}/io", "r") as f:
+            for line in f:
+                if line.startswith("read_bytes:"):
+                    read = int(line.split()[1])
+                elif line.startswith("write_bytes:"):
+                    write = int(line.split()[1])
+    except OSError:
+        pass  # /proc/<pid>/io needs the same user (or ptrace rights)
+    return ticks, rss, swap, read, write, threads
+
+def sparkline(values, width=30):
+    """Unicode sparkline of `values`, max-pooled down to at most `width` characters."""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return ""
+    if values.size > width:
+        # Max per bucket so short spikes survive the downsampling
+        edges = np.linspace(0, values.size, width + 1).astype(int)
+        values = np.maximum.reduceat(values, edges[:-1])
+    low, high = np.nanmin(values), np.nanmax(values)
+    if high <= low:
+        return _SPARK_CHARS[0] * values.size
+    levels = ((values - low) / (high - low) * (len(_SPARK_CHARS) - 1)).round().astype(int)
+    return "".join(_SPARK_CHARS[level] for level in levels)
+
+def _format_bytes(n):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n:.0f} B"
+        n /= 1024
+    return f"{n:.1f} TiB"
+
+class ResourceSampler:
+    """Fixed-size time series of the resource usage of one process tree.
+
+    Each `sample()` reads /proc for `pid` and its descendants and appends one
+    SAMPLE_DTYPE row to a preallocated ring buffer, so memory stays at
+    `capacity` rows however long the experiment runs. CPU is reported in
+    percent of one core (400% = four busy cores).
+
+    Args:
+        pid: root process (e.g. the shell started by the job scheduler).
+        capacity: number of samples kept.
+    """
+
+    def __init__(self, pid, capacity=720):
+        self.pid = pid
+        self.capacity = capacity
+        self.alive = True
+        self._buffer = np.zeros(capacity, dtype=SAMPLE_DTYPE)
+        self._count = 0
+        self._last_ticks = None
+        self._lock = threading.Lock()
+
+    def sample(self, now=None):
+        """Takes one sample; returns False (and marks the sampler dead) once the process is gone."""
+        now = time.time() if now is None else now
+        if not os.path.exists(f"/proc/{self.pid}"):
+            self.alive = False
+            return False
+
+        totals = np.zeros(6, dtype=np.int64)
+        procs = 0
+        for pid in _process_tree(self.pid):
+            stats = _read_process(pid)
+            if stats is not None:
+                totals += stats
+                procs += 1
+        if procs == 0:
+            self.alive = False
+            return False
+
+        ticks = int(totals[0])
+        cpu = 0.0
+        if self._last_ticks is not None:
+            last_time, last_ticks = self._last_ticks
+            if now > last_time:
+                # Exited children take their ticks with them; never report negative usage
+                cpu = max(0.0, (ticks - last_ticks) / _CLOCK_TICKS / (now - last_time) * 100)
+        self._last_ticks = (now, ticks)
+
+        with self._lock:
+            row = self._buffer[self._count % self.capacity]
+            row['time'], row['cpu'], row['rss'], row['swap'] = now, cpu, totals[1], totals[2]
+            row['read'], row['write'], row['threads'], row['procs'] = totals[3], totals[4], totals[5], procs
+            self._count += 1
+        return True
+
+    def series(self):
+        """Samples in chronological order (a copy of at most `capacity` rows)."""
+        with self._lock:
+            if self._count <= self.capacity:
+                return self._buffer[:self._count].copy()
+            head = self._count % self.capacity
+            return np.concatenate([self._buffer[head:], self._buffer[:head]])
+
+    def report(self, width=30):
+        """Current and peak stats with sparklines, as plain text."""
+        samples = self.series()
+        if len(samples) < 2:
+            return "Not enough samples yet."
+
+        elapsed = np.diff(samples['time'])
+        elapsed[elapsed <= 0] = np.nan
+        read_rate = np.clip(np.diff(samples['read']) / elapsed, 0, None)
+        write_rate = np.clip(np.diff(samples['write']) / elapsed, 0, None)
+        last = samples[-1]
+        cpu = samples['cpu'][1:]  # the first sample has no CPU delta
+
+        lines = [
+            f"CPU     {cpu[-1]:6.0f}%   peak {cpu.max():.0f}%",
+            f"        {sparkline(cpu, width)}",
+            f"RSS     {_format_bytes(last['rss']):>10}   peak {_format_bytes(samples['rss'].max())}",
+            f"        {sparkline(samples['rss'], width)}",
+            f"Read    {_format_bytes(np.nan_to_num(read_rate[-1])):>10}/s total {_format_bytes(last['read'])}",
+            f"Write   {_format_bytes(np.nan_to_num(write_rate[-1])):>10}/s total {_format_bytes(last['write'])}",
+            f"Threads {last['threads']:>6}   peak {samples['threads'].max()} ({last['procs']} procs)",
+        ]
+        if samples['swap'].max() > 0:
+            lines.append(f"Swap    {_format_bytes(last['swap']):>10}   peak {_format_bytes(samples['swap'].max())}")
+
+        # Hints for the usual "why is it slow" questions
+        recent = cpu[-min(len(cpu), 6):]
+        if last['swap'] > 0 and last['swap'] >= samples['swap'][0]:
+            lines.append("⚠ swapping")
+        if self.alive and recent.max() < 5:
+            lines.append("⚠ idle CPU for the last samples: stalled or waiting on IO?")
+        if not self.alive:
+            lines.append("(process has exited)")
+
+        span = (samples['time'][-1] - samples['time'][0]) / 60
+        lines.append(f"{len(samples)} samples over {span:.0f} min")
+        return "\n".join(lines)
+
+class TelemetryMonitor:
+    """Samples every attached process tree from one background thread.
+
+    The launcher calls `attach(name, pid)` (or `sync` with all running jobs);
+    samplers of exited processes are kept, up to `keep_finished`, so their last
+    usage can still be inspected.
+
+    Args:
+        interval: seconds between samples.
+        capacity: samples kept per process (default: one hour at 5 s).
+        keep_finished: number of exited samplers kept around.
+    """
+
+    def __init__(self, interval=5.0, capacity=720, keep_finished=10):
+        self.interval = interval
+        self.capacity = capacity
+        self.keep_finished = keep_finished
+        self._samplers = OrderedDict()  # name -> ResourceSampler
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def attach(self, name, pid):
+        """Starts sampling `pid` under `name` (replacing an older sampler of another pid)."""
+        with self._lock:
+            current = self._samplers.get(name)
+            if current is not None and current.pid == pid:
+                return current
+            sampler = ResourceSampler(pid, self.capacity)
+            self._samplers[name] = sampler
+            self._samplers.move_to_end(name)
+        sampler.sample()
+        self._ensure_thread()
+        return sampler
+
+    def sync(self, running):
+        """Attaches every {name: pid} in `running` that is not sampled yet."""
+        for name, pid in running.items():
+            if pid is not None:
+                self.attach(name, pid)
+
+    def get(self, name):
+        with self._lock:
+            return self._samplers.get(name)
+
+    def names(self):
+        with self._lock:
+            return list(self._samplers)
+
+    def sample_all(self):
+        with self._lock:
+            samplers = list(self._samplers.items())
+        for _, sampler in samplers:
+            if sampler.alive:
+                sampler.sample()
+
+        with self._lock:
+            finished = [name for name, sampler in self._samplers.items() if not sampler.alive]
+            for name in finished[:max(0, len(finished) - self.keep_finished)]:
+                del self._samplers[name]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample_all()
+            except Exception as e:
+                print(f"Telemetry error: {e}")
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="benri-telemetry", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,202 @@
+import csv
+import io
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+def _fsync_dir(path):
+    """Persist a rename in `path` (best effort; not every filesystem supports it)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_json_atomic(path, data, fsync=False):
+    """Write `data` as JSON to a temporary file next to `path` and rename it over `path`.
+
+    Readers see either the old or the new file, never a half-written one.
+
+    Args:
+        path: destination file.
+        data: JSON-serializable object.
+        fsync: also flush the file and the rename to disk (slower, survives power loss).
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if fsync:
+        _fsync_dir(path.parent)
+
+class ExperimentWriter:
+    """Buffered writer for an experiment's results CSV and state.json.
+
+    Result rows are kept in memory and appended in one write per batch, when
+    `flush_rows` rows are pending or `flush_interval` seconds have passed. State
+    updates are merged and written atomically (write + rename) at most every
+    `state_interval` seconds, so the bot never reads a half-written state.json.
+    All I/O runs on a background thread; `log_result` and `update_state` only
+    touch memory. If a write fails (e.g. a network filesystem hiccup) the data is
+    kept and retried on the next flush.
+
+    Use it as a context manager, or call `close()` at the end, to flush everything:
+
+        with ExperimentWriter(folder, results_path=csv_path) as writer:
+            writer.update_state(idx=0, total=len(grid), status="running")
+            for idx, config in enumerate(grid):
+                writer.log_result({**config, 'test_auc': train(config)})
+                writer.update_state(idx=idx + 1)
+            writer.update_state(status="completed")
+
+    Args:
+        folder: experiment folder; state.json is written there.
+        results_path: results CSV (default: folder / 'results_grid_search.csv').
+        flush_rows: pending rows that trigger a flush.
+        flush_interval: maximum seconds a row stays in memory.
+        state_interval: minimum seconds between state.json writes.
+        fsync: fsync every flush (durable, but slower on network filesystems).
+    """
+
+    def __init__(self, folder, results_path=None, flush_rows=100, flush_interval=30.0,
+                 state_interval=5.0, fsync=False):
+        self.folder = Path(folder)
+        self.results_path = Path(results_path) if results_path else self.folder / "results_grid_search.csv"
+        self.state_path = self.folder / "state.json"
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.state_interval = state_interval
+        self.fsync = fsync
+
+        self._rows = []
+        self._columns = None
+        self._state = {}
+        self._state_dirty = False
+        self._last_rows_flush = time.monotonic()
+        self._last_state_write = 0.0
+
+        self._lock = threading.Lock()          # protects the buffers
+        self._io_lock = threading.Lock()       # one flush at a time
+        self._wake = threading.Condition(self._lock)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="benri-writer", daemon=True)
+        self._thread.start()
+
+    # --- Producer side (training loop) ---
+
+    def log_result(self, row):
+        """Queue one result row (a dict); columns are fixed by the file header or the first row."""
+        self.log_results([row])
+
+    def log_results(self, rows):
+        with self._lock:
+            if self._closed:
+                raise ValueError("ExperimentWriter is closed.")
+            self._rows.extend(dict(row) for row in rows)
+            if len(self._rows) >= self.flush_rows:
+                self._wake.notify()
+
+    def update_state(self, **fields):
+        """Merge fields (idx, total, status, ...) into state.json; written on the next state flush."""
+        with self._lock:
+            self._state.update(fields)
+            self._state_dirty = True  # the flusher picks it up within state_interval
+
+    # --- I/O ---
+
+    def _header(self):
+        """Columns of an existing results file, or None if it is missing or empty."""
+        try:
+            with open(self.results_path, "r", newline="") as f:
+                return next(csv.reader(f), None)
+        except OSError:
+            return None
+
+    def _write_rows(self, rows):
+        columns = self._columns if self._columns is not None else self._header()
+        write_header = columns is None
+        if write_header:
+            columns = list(dict.fromkeys(key for row in rows for key in row))
+
+        # One buffered append per batch: readers see whole lines, not one write per field
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+
+        self.results_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.results_path, "a", newline="") as f:
+            f.write(buffer.getvalue())
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        # Only once the append went through: a failed first flush must write the header again
+        self._columns = columns
+
+    def flush(self, force=True):
+        """Write pending rows and state now (`force`) or only what is due; returns when done."""
+        with self._io_lock:
+            now = time.monotonic()
+            with self._lock:
+                rows_due = self._rows and (force or len(self._rows) >= self.flush_rows
+                                           or now - self._last_rows_flush >= self.flush_interval)
+                rows, self._rows = (self._rows, []) if rows_due else ([], self._rows)
+                state_due = self._state_dirty and (force or now - self._last_state_write >= self.state_interval)
+                state = dict(self._state) if state_due else None
+                if state_due:
+                    self._state_dirty = False
+
+            if rows:
+                try:
+                    self._write_rows(rows)
+                    self._last_rows_flush = now
+                except OSError as e:
+                    print(f"Could not append results to {self.results_path}: {e}")
+                    with self._lock:
+                        self._rows[:0] = rows  # keep them for the next flush
+            if state is not None:
+                try:
+                    write_json_atomic(self.state_path, state, fsync=self.fsync)
+                    self._last_state_write = now
+                except (OSError, TypeError, ValueError) as e:
+                    print(f"Could not write {self.state_path}: {e}")
+                    with self._lock:
+                        self._state_dirty = True
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                self._wake.wait(timeout=min(self.flush_interval, self.state_interval))
+                if self._closed:
+                    return
+            self.flush(force=False)
+
+    def close(self):
+        """Flush everything and stop the background thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake.notify()
+        self._thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()